@@ -0,0 +1,92 @@
+"""
+JWT-аутентификация без запроса пользователя к базе.
+
+В токен, выдаваемый access_token, записываются username, role,
+is_superuser и token_version пользователя. По такому токену
+request.user — это TokenUser, собранный из claims. Чтобы смена роли
+или блокировка вступали в силу, версия токена сверяется с текущей
+token_version пользователя: она читается из базы и запоминается в
+памяти процесса на LOCAL_TIMEOUT секунд, так что отзыв токена доходит
+до всех воркеров не позже чем через LOCAL_TIMEOUT. Токены без claims
+(выданные до этого изменения) по-прежнему проверяются запросом к базе.
+"""
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+VERSION_CLAIM = 'ver'
+CLAIMS = ('username', 'role', 'is_superuser')
+
+_lock = threading.Lock()
+_local_versions = {}
+
+
+def get_setting(name, default):
+    return getattr(settings, 'API_STATELESS_JWT', {}).get(name, default)
+
+
+def get_token_for_user(user):
+    """Токен доступа с данными, нужными для проверки прав."""
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def get_token_version(user_id, at_least=0):
+    """
+    Текущая token_version пользователя или None, если пользователь
+    удалён или заблокирован. Запомненная версия меньше at_least (версии
+    предъявленного токена) значит, что токен выдан после её чтения,
+    например другим воркером, поэтому версия сразу перечитывается.
+    """
+    with _lock:
+        version, expires = _local_versions.get(user_id, (None, 0))
+    if expires <= time.monotonic() or 0 <= version < at_least:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        # Удалённый или заблокированный пользователь запоминается как -1.
+        version = -1 if version is None else version
+        with _lock:
+            _local_versions[user_id] = (
+                version,
+                time.monotonic() + get_setting('LOCAL_TIMEOUT', 5)
+            )
+    return None if version < 0 else version
+
+
+def forget_token_version(user_id):
+    with _lock:
+        _local_versions.pop(user_id, None)
+
+
+def clear_local_versions():
+    with _lock:
+        _local_versions.clear()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Собирает пользователя из claims токена, если они есть."""
+
+    def get_user(self, validated_token):
+        if (
+            not get_setting('ENABLED', True)
+            or VERSION_CLAIM not in validated_token
+        ):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = validated_token[VERSION_CLAIM]
+        if version != get_token_version(user_id, at_least=version):
+            raise AuthenticationFailed(
+                'Токен отозван, получите новый.', code='token_revoked'
+            )
+        return TokenUser(validated_token)
@@ -0,0 +1,97 @@
+"""
+Пакетные запросы: POST /api/v1/batch/ выполняет несколько запросов
+к API за один HTTP-запрос.
+
+Подзапросы вызывают view напрямую, без сети и middleware: пользователь
+берётся из внешнего запроса (аутентификация выполняется один раз), а
+соединение с базой общее. Права и ограничения частоты каждый view
+проверяет сам, как при обычном запросе.
+"""
+import io
+import json
+import time
+from contextlib import nullcontext
+from urllib.parse import unquote, unquote_to_bytes
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from django.utils.encoding import iri_to_uri
+from rest_framework import status
+
+DEFAULTS = {
+    'MAX_REQUESTS': 20,
+}
+METHODS = ('GET', 'POST', 'PATCH', 'DELETE')
+
+
+def get_setting(name):
+    return getattr(settings, 'API_BATCH', {}).get(name, DEFAULTS[name])
+
+
+def make_request(request, method, path, body=None):
+    """WSGI-запрос с окружением и пользователем внешнего запроса."""
+    path_info, _, query = path.partition('?')
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    environ = dict(request.META)
+    environ.update({
+        'REQUEST_METHOD': method,
+        # WSGI передаёт путь байтами в latin-1, а строку запроса — ASCII.
+        'PATH_INFO': unquote_to_bytes(path_info).decode('iso-8859-1'),
+        'QUERY_STRING': iri_to_uri(query),
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(data)),
+        'wsgi.input': io.BytesIO(data),
+    })
+    subrequest = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        # DRF использует их вместо аутентификации, см. Request.__init__.
+        # Анонимный подзапрос аутентифицируется как обычно, чтобы
+        # получить 401, а не 403.
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def dispatch(request, method, path, body=None):
+    """Выполняет подзапрос и возвращает (статус, данные ответа)."""
+    try:
+        match = resolve(unquote(path.partition('?')[0]))
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {'detail': 'Страница не найдена.'}
+    if match.url_name == 'batch':
+        return status.HTTP_400_BAD_REQUEST, {
+            'detail': 'Пакет не может содержать пакетные запросы.'
+        }
+    response = match.func(
+        make_request(request, method, path, body),
+        *match.args, **match.kwargs
+    )
+    return response.status_code, getattr(response, 'data', None)
+
+
+def execute(request, items, atomic=False):
+    """
+    Выполняет подзапросы по порядку. С atomic все они идут в одной
+    транзакции, а первый ответ с ошибкой откатывает её и останавливает
+    пакет. Возвращает (ответы, выполнен ли пакет целиком).
+    """
+    responses = []
+    with transaction.atomic() if atomic else nullcontext():
+        for item in items:
+            started = time.perf_counter()
+            status_code, data = dispatch(
+                request, item['method'], item['path'], item.get('body')
+            )
+            responses.append({
+                'status': status_code,
+                'body': data,
+                'duration_ms': round(
+                    (time.perf_counter() - started) * 1000, 2
+                ),
+            })
+            if atomic and status_code >= status.HTTP_400_BAD_REQUEST:
+                transaction.set_rollback(True)
+                return responses, False
+    return responses, True
@@ -0,0 +1,151 @@
+"""
+Версии данных, кэш ответов и условные GET-запросы.
+
+Версия — это отметка времени в микросекундах последнего изменения
+модели целиком ('title') или её части ('reviews:5' — отзывы
+произведения 5). Версии хранятся в таблице DataVersion, поэтому все
+воркеры видят одни и те же отметки. Ответ зависит от набора версий:
+из них одним запросом к базе строятся ключ кэша, ETag и Last-Modified,
+поэтому ни кэш, ни проверка If-None-Match не требуют сериализации.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+from reviews.models import DataVersion
+
+from . import metrics
+
+CACHE_SETTINGS = getattr(settings, 'API_RESPONSE_CACHE', {})
+PREFIX = 'api-response'
+
+
+def get_cache():
+    return caches[CACHE_SETTINGS.get('ALIAS', 'default')]
+
+
+def get_version_key(name):
+    return f'{PREFIX}:version:{name}'
+
+
+def now():
+    return time.time_ns() // 1000
+
+
+def get_versions(names):
+    """
+    Возвращает текущие версии в порядке names одним запросом. Версия,
+    которая ещё ни разу не менялась, равна 0.
+    """
+    versions = dict(
+        DataVersion.objects.filter(name__in=names).values_list(
+            'name', 'stamp'
+        )
+    )
+    return [versions.get(name, 0) for name in names]
+
+
+def bump_versions(*names):
+    stamp = now()
+    updated = DataVersion.objects.filter(name__in=names).update(
+        stamp=Greatest(F('stamp') + 1, Value(stamp))
+    )
+    if updated < len(set(names)):
+        DataVersion.objects.bulk_create([
+            DataVersion(name=name, stamp=stamp) for name in set(names)
+        ], ignore_conflicts=True)
+
+
+def get_last_modified(versions):
+    """
+    Время последнего изменения в секундах или None, если изменений не
+    было или последнее пришлось на текущую секунду: второе изменение в
+    ту же секунду дало бы тот же Last-Modified, и запрос с
+    If-Modified-Since ошибочно получил бы ответ 304.
+    """
+    last_modified = max(versions, default=0) // 1_000_000
+    if 0 < last_modified < now() // 1_000_000:
+        return last_modified
+    return None
+
+
+class VersionedListMixin:
+    """
+    Отвечает 304 на условные GET-запросы к list и кэширует ответы.
+    get_cache_versions() перечисляет версии, от которых зависит ответ.
+    """
+    cache_versions = ()
+    cache_responses = True
+
+    def get_cache_versions(self):
+        return self.cache_versions
+
+    def get_versioned_response(self, handler, request, *args, **kwargs):
+        if not CACHE_SETTINGS.get('ENABLED', True):
+            return handler(request, *args, **kwargs)
+        versions = get_versions(self.get_cache_versions())
+        signature = ':'.join((
+            self.basename, self.action, request.get_full_path(),
+            *(str(version) for version in versions)
+        ))
+        digest = hashlib.md5(signature.encode('utf-8')).hexdigest()
+        headers = {'ETag': f'W/"{digest}"'}
+        last_modified = get_last_modified(versions)
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified)
+        unchanged = HttpResponse(headers=headers)
+        conditional = get_conditional_response(
+            request,
+            etag=headers['ETag'],
+            last_modified=last_modified,
+            response=unchanged
+        )
+        if conditional is not unchanged:
+            metrics.increment('conditional_get', 'not_modified')
+            return conditional
+        if self.cache_responses:
+            response = self.get_cached_response(
+                digest, handler, request, *args, **kwargs
+            )
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    def get_cached_response(self, digest, handler, request, *args,
+                            **kwargs):
+        cache = get_cache()
+        key = f'{PREFIX}:{digest}'
+        data = cache.get(key)
+        if data is not None:
+            metrics.increment('response_cache', 'hits')
+            return Response(data, headers={'X-Cache': 'HIT'})
+        metrics.increment('response_cache', 'misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CACHE_SETTINGS.get('TIMEOUT', 300))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_versioned_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class VersionedResponseMixin(VersionedListMixin):
+    """То же для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_versioned_response(
+            super().retrieve, request, *args, **kwargs
+        )
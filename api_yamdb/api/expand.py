@@ -0,0 +1,128 @@
+"""
+Встраивание связанных объектов: ?expand=reviews,reviews.comments.
+
+Каждый уровень загружается одним запросом на всех родителей сразу:
+первые LIMITS[связь] детей каждого родителя выбираются коррелированным
+подзапросом с LIMIT по индексу (родитель, pub_date, id). Поэтому
+произведение с отзывами и комментариями к ним — это три запроса,
+сколько бы отзывов ни было.
+"""
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from reviews.models import Comment, Review
+from rest_framework.exceptions import ValidationError
+
+from .serializers import CommentSerializer, ReviewSerializer
+
+DEFAULTS = {
+    'LIMITS': {'reviews': 10, 'comments': 5},
+}
+ORDERING = ('pub_date', 'id')
+
+
+def get_setting(name):
+    return getattr(settings, 'API_EXPAND', {}).get(name, DEFAULTS[name])
+
+
+def get_relations():
+    """Связь -> (queryset детей, поле родителя, сериализатор)."""
+    return {
+        'reviews': (
+            Review.objects.select_related('author').only(
+                'id', 'text', 'score', 'pub_date', 'title_id',
+                'author__username'
+            ),
+            'title',
+            ReviewSerializer,
+        ),
+        'comments': (
+            Comment.objects.select_related('author').only(
+                'id', 'text', 'pub_date', 'review_id', 'author__username'
+            ),
+            'review',
+            CommentSerializer,
+        ),
+    }
+
+
+def get_tree(paths):
+    """('reviews', 'reviews.comments') -> {'reviews': {'comments': {}}}."""
+    tree = {}
+    for path in paths:
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def load_children(queryset, parent_field, parents, limit, to_attr):
+    """
+    Кладёт в атрибут to_attr каждого из parents список его первых limit
+    детей и возвращает всех загруженных детей.
+    """
+    by_id = {parent.pk: parent for parent in parents}
+    for parent in parents:
+        setattr(parent, to_attr, [])
+    if not by_id or limit < 1:
+        return []
+    first = queryset.model.objects.filter(
+        **{parent_field: OuterRef(parent_field)}
+    ).order_by(*ORDERING).values('pk')[:limit]
+    children = list(queryset.filter(
+        **{f'{parent_field}__in': by_id}, pk__in=Subquery(first)
+    ).order_by(*ORDERING))
+    for child in children:
+        parent = by_id[getattr(child, f'{parent_field}_id')]
+        # Родитель уже загружен, сериализатору не нужен запрос за ним.
+        setattr(child, parent_field, parent)
+        getattr(parent, to_attr).append(child)
+    return children
+
+
+def expand(serializer, instances, tree):
+    """Загружает связи из tree и добавляет их поля в serializer."""
+    fields = getattr(serializer, 'child', serializer).fields
+    relations = get_relations()
+    limits = get_setting('LIMITS')
+    for name, subtree in tree.items():
+        queryset, parent_field, serializer_class = relations[name]
+        to_attr = f'expanded_{name}'
+        children = load_children(
+            queryset, parent_field, instances, limits[name], to_attr
+        )
+        fields[name] = serializer_class(
+            many=True, read_only=True, source=to_attr
+        )
+        expand(fields[name], children, subtree)
+
+
+class ExpandMixin:
+    """
+    ?expand= для действий из expand_actions. expandable — допустимые
+    пути; вложенный путь 'reviews.comments' включает и 'reviews'.
+    """
+    expandable = ()
+    expand_actions = ('list', 'retrieve')
+
+    def get_expand(self):
+        if self.action not in self.expand_actions:
+            return set()
+        if not hasattr(self, '_expand'):
+            value = self.request.query_params.get('expand', '')
+            paths = {path.strip() for path in value.split(',')} - {''}
+            unknown = paths - set(self.expandable)
+            if unknown:
+                raise ValidationError(
+                    {'expand': f'Неизвестные связи: '
+                               f'{", ".join(sorted(unknown))}'}
+                )
+            self._expand = paths
+        return self._expand
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        paths = self.get_expand()
+        if paths and args:
+            instances = args[0] if kwargs.get('many') else [args[0]]
+            expand(serializer, list(instances), get_tree(paths))
+        return serializer
@@ -0,0 +1,97 @@
+"""
+Выборочные поля в ответах: ?fields=id,name оставляет только
+перечисленные поля, ?omit=description — все, кроме перечисленных.
+
+Поле убирается и из сериализатора, и из запроса к базе: связи, нужные
+только ему, не присоединяются и не подгружаются, а столбец модели
+с тем же именем откладывается через defer().
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_fields(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetsMixin:
+    """
+    Связи задаются здесь, а не в queryset: select_related_fields и
+    prefetch_related_fields сопоставляют полю сериализатора lookup,
+    который загружается только ради него. sparse_required — столбцы,
+    которые нельзя откладывать, например поле курсорной пагинации.
+    """
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    sparse_required = ()
+
+    def get_omitted_fields(self):
+        """Поля сериализатора, которых не будет в ответе на GET."""
+        if self.request.method not in SAFE_METHODS:
+            return set()
+        if not hasattr(self, '_omitted_fields'):
+            self._omitted_fields = self.parse_omitted_fields()
+        return self._omitted_fields
+
+    def parse_omitted_fields(self):
+        params = self.request.query_params
+        available = set(self.get_serializer_class()().fields)
+        requested = {}
+        for param in ('fields', 'omit'):
+            names = parse_fields(params.get(param, ''))
+            unknown = names - available
+            if unknown:
+                raise ValidationError(
+                    {param: f'Неизвестные поля: {", ".join(sorted(unknown))}'}
+                )
+            requested[param] = names
+        omitted = requested['omit']
+        if requested['fields']:
+            omitted |= available - requested['fields']
+        return omitted
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        omitted = self.get_omitted_fields()
+        if omitted:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in omitted:
+                fields.pop(name, None)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        return self.prune_queryset(super().filter_queryset(queryset))
+
+    def prune_queryset(self, queryset):
+        omitted = self.get_omitted_fields()
+        select = [
+            lookup for name, lookup in self.select_related_fields.items()
+            if name not in omitted
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        prefetch = [
+            lookup for name, lookup in self.prefetch_related_fields.items()
+            if name not in omitted
+        ]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        deferred = [
+            name for name in omitted
+            if name not in self.sparse_required
+            and self.is_deferrable(queryset.model, name)
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+    def is_deferrable(self, model, name):
+        """Столбец модели, который не нужен ни полям, ни связям ответа."""
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not field.concrete or field.primary_key or field.many_to_many:
+            return False
+        return not field.is_relation or name in self.select_related_fields
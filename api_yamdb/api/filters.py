@@ -1,15 +1,49 @@
 import django_filters as dj_filt
+from django_filters.constants import EMPTY_VALUES
+from reviews import search
 from reviews.models import Title
 
 
+class TitleOrderingFilter(dj_filt.OrderingFilter):
+    """
+    Сортировка с доворотом по id в том же направлении, что и первое
+    поле: порядок страниц однозначен, а индекс (поле, id) читается
+    целиком в одну сторону, без сортировки во временном B-дереве.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        tiebreaker = '-id' if ordering[0].startswith('-') else 'id'
+        return qs.order_by(*ordering, tiebreaker)
+
+
 class TitleFilter(dj_filt.FilterSet):
     name = dj_filt.CharFilter(
         field_name='name', lookup_expr='icontains'
     )
     year = dj_filt.NumberFilter(field_name='year')
+    year_min = dj_filt.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = dj_filt.NumberFilter(field_name='year', lookup_expr='lte')
+    rating_min = dj_filt.NumberFilter(field_name='rating', lookup_expr='gte')
     genre = dj_filt.CharFilter(field_name='genre__slug')
     category = dj_filt.CharFilter(field_name='category__slug')
+    search = dj_filt.CharFilter(method='filter_search')
+    ordering = TitleOrderingFilter(fields=(
+        ('rating', 'rating'),
+        ('year', 'year'),
+        ('rating_count', 'reviews_count'),
+        ('name', 'name'),
+    ))
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'genre', 'category',)
+        fields = (
+            'name', 'year', 'year_min', 'year_max', 'rating_min', 'genre',
+            'category', 'search', 'ordering',
+        )
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск, самые релевантные произведения первыми."""
+        return search.filter_ranked(queryset, 'title', value)
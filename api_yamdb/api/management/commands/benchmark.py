@@ -0,0 +1,317 @@
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import django
+from api.cache import CACHE_SETTINGS, bump_versions
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext,
+                               setup_test_environment,
+                               teardown_test_environment)
+from rest_framework.test import APIClient
+from reviews.models import (Category, Comment, Genre, GenreToTitle, Review,
+                            Title)
+from users.models import OutboxMessage, User
+
+SCENARIOS = (
+    'title_list', 'title_filter', 'title_top', 'leaderboard', 'similar',
+    'trending', 'title_detail', 'review_list', 'comment_list', 'signup',
+    'token',
+)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * len(values))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    """Команда для замера производительности API на синтетических данных:
+     python manage.py benchmark [--titles N] [--reviews N] [--users N]
+     [--requests N] [--output results.json] """
+
+    help = 'Замер задержек, пропускной способности и числа SQL-запросов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество запросов в каждом сценарии'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            help='Запустить только эти сценарии'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Отключить кэш ответов на время замера'
+        )
+        parser.add_argument(
+            '--label',
+            default='',
+            help='Метка прогона, например хеш коммита'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для результатов в JSON, по умолчанию stdout'
+        )
+
+    def bulk_create(self, model, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+
+    def seed(self, options):
+        """Заполняет тестовую базу данными заданного объёма."""
+        users, titles = options['users'], options['titles']
+        reviews = options['reviews']
+        if reviews > users * titles:
+            raise CommandError(
+                'Отзывов не может быть больше, чем пар '
+                'пользователь-произведение.'
+            )
+        self.bulk_create(User, (
+            User(
+                id=number, username=f'user{number}',
+                email=f'user{number}@yamdb.fake'
+            )
+            for number in range(1, users + 1)
+        ))
+        self.bulk_create(Category, (
+            Category(id=number, name=f'Категория {number}',
+                     slug=f'category-{number}')
+            for number in range(1, options['categories'] + 1)
+        ))
+        self.bulk_create(Genre, (
+            Genre(id=number, name=f'Жанр {number}', slug=f'genre-{number}')
+            for number in range(1, options['genres'] + 1)
+        ))
+        self.bulk_create(Title, (
+            Title(
+                id=number, name=f'Произведение {number}',
+                description=f'Описание произведения {number}',
+                year=1900 + number % 120,
+                category_id=number % options['categories'] + 1
+            )
+            for number in range(1, titles + 1)
+        ))
+        self.bulk_create(GenreToTitle, (
+            GenreToTitle(
+                title_id=number,
+                genre_id=(number + shift) % options['genres'] + 1
+            )
+            for number in range(1, titles + 1)
+            for shift in range(number % 3 + 1)
+        ))
+        # k-й отзыв пользователя a — на произведение (a + k) % titles,
+        # поэтому пары автор-произведение не повторяются.
+        self.bulk_create(Review, (
+            Review(
+                id=number + 1,
+                author_id=number % users + 1,
+                title_id=(number % users + number // users) % titles + 1,
+                text=f'Отзыв номер {number + 1}',
+                score=self.random.randint(1, 10)
+            )
+            for number in range(reviews)
+        ))
+        self.bulk_create(Comment, (
+            Comment(
+                review_id=self.random.randint(1, reviews),
+                author_id=self.random.randint(1, users),
+                text=f'Комментарий номер {number}'
+            )
+            for number in range(options['comments'] if reviews else 0)
+        ))
+        call_command('rebuild_ratings', verbosity=0, stdout=sys.stderr)
+        call_command('rebuild_search_index', verbosity=0, stdout=sys.stderr)
+        call_command('rebuild_leaderboards', verbosity=0, stdout=sys.stderr)
+        call_command(
+            'rebuild_similar_titles', verbosity=0, stdout=sys.stderr
+        )
+        call_command('compact_trending', verbosity=0, stdout=sys.stderr)
+        bump_versions('category', 'genre', 'title', 'user')
+
+    def get_requests(self, scenario, options):
+        """
+        Возвращает функцию, готовящую очередной запрос сценария: пару
+        (путь, данные POST-запроса или None). Подготовка не замеряется.
+        """
+        client = APIClient()
+        titles, reviews = options['titles'], options['reviews']
+        pages = max(1, titles // 10)
+        counter = iter(range(sys.maxsize))
+
+        def signup():
+            number = next(counter)
+            return '/api/v1/auth/signup/', {
+                'username': f'bench{number}',
+                'email': f'bench{number}@yamdb.fake',
+            }
+
+        def token():
+            path, data = signup()
+            client.post(path, data=data)
+            # Код хранится хешем, поэтому берётся из письма в очереди.
+            message = OutboxMessage.objects.latest('id')
+            return '/api/v1/auth/token/', {
+                'username': data['username'],
+                'confirmation_code': re.search(
+                    r'<b>(\d+)</b>', message.body
+                ).group(1),
+            }
+
+        def comment_list():
+            review_id = self.random.randint(1, reviews)
+            title_id = Review.objects.values_list(
+                'title_id', flat=True
+            ).get(pk=review_id)
+            return (
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+                None
+            )
+
+        requests = {
+            'title_list': lambda: (
+                f'/api/v1/titles/?page={self.random.randint(1, pages)}', None
+            ),
+            'title_filter': lambda: (
+                '/api/v1/titles/?genre=genre-'
+                f'{self.random.randint(1, options["genres"])}'
+                f'&year={self.random.randint(1900, 2019)}', None
+            ),
+            'title_top': lambda: (
+                '/api/v1/titles/?ordering=-rating&year_min='
+                f'{self.random.randint(1900, 2019)}', None
+            ),
+            'leaderboard': lambda: (
+                '/api/v1/titles/top/?genre=genre-'
+                f'{self.random.randint(1, options["genres"])}', None
+            ),
+            'similar': lambda: (
+                f'/api/v1/titles/{self.random.randint(1, titles)}/similar/',
+                None
+            ),
+            'trending': lambda: (
+                '/api/v1/titles/trending/?window='
+                f'{self.random.choice(("1h", "24h", "7d"))}', None
+            ),
+            'title_detail': lambda: (
+                f'/api/v1/titles/{self.random.randint(1, titles)}/', None
+            ),
+            'review_list': lambda: (
+                f'/api/v1/titles/{self.random.randint(1, titles)}/reviews/',
+                None
+            ),
+            'comment_list': comment_list,
+            'signup': signup,
+            'token': token,
+        }
+        return client, requests[scenario]
+
+    def run_scenario(self, scenario, options):
+        client, prepare = self.get_requests(scenario, options)
+        latencies, queries, errors = [], [], 0
+        for _ in range(options['requests']):
+            path, data = prepare()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                if data is None:
+                    response = client.get(path)
+                else:
+                    response = client.post(path, data=data)
+                latencies.append(time.perf_counter() - started)
+            queries.append(len(context.captured_queries))
+            if response.status_code >= 400:
+                errors += 1
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': round(len(latencies) / sum(latencies), 2),
+            'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'queries_mean': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        scenarios = options['scenario'] or SCENARIOS
+        if options['reviews'] == 0:
+            scenarios = [
+                name for name in scenarios if name != 'comment_list'
+            ]
+        if options['no_cache']:
+            CACHE_SETTINGS['ENABLED'] = False
+        setup_test_environment()
+        # Письма остаются в очереди: замеряется только ответ на запрос.
+        settings.MAIL_OUTBOX = {**settings.MAIL_OUTBOX, 'MODE': 'command'}
+        settings.API_THROTTLING = {**settings.API_THROTTLING, 'ENABLED': False}
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            started = time.perf_counter()
+            self.seed(options)
+            seed_seconds = time.perf_counter() - started
+            results = {}
+            for scenario in scenarios:
+                self.stderr.write(f'{scenario}...')
+                results[scenario] = self.run_scenario(scenario, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report = {
+            'label': options['label'],
+            'created': datetime.now(timezone.utc).isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {
+                name: options[name] for name in (
+                    'users', 'titles', 'reviews', 'comments',
+                    'categories', 'genres',
+                )
+            },
+            'settings': {
+                'requests': options['requests'],
+                'seed': options['seed'],
+                'response_cache': not options['no_cache'],
+            },
+            'seed_seconds': round(seed_seconds, 2),
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from reviews import trending
+from reviews.models import TrendingScore
+
+
+class Command(BaseCommand):
+    """Команда для сжатия активности произведений:
+     python manage.py compact_trending """
+
+    help = (
+        'Пересчёт активности произведений по недавним отзывам и '
+        'комментариям и удаление затухших строк'
+    )
+
+    def handle(self, *args, **options):
+        moment = timezone.now()
+        windows = trending.get_setting('WINDOWS')
+        kept = 0
+        with transaction.atomic():
+            # Строки окон, убранных из настроек.
+            TrendingScore.objects.exclude(window__in=windows).delete()
+            for window in windows:
+                scores = trending.calculate(window, moment)
+                trending.store(window, scores)
+                kept += len(scores)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано окон: {len(windows)}, строк активности: {kept}'
+        ))
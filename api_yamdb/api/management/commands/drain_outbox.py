@@ -0,0 +1,53 @@
+import time
+
+from api import outbox
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    """Команда для отправки писем из очереди:
+     python manage.py drain_outbox [--batch-size N] [--rate N]
+     [--loop [--interval S]] """
+
+    help = 'Отправка писем из очереди исходящих'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=outbox.get_setting('BATCH_SIZE'),
+            help='Количество писем на одно соединение с почтовым сервером'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Не больше стольких писем в секунду, 0 — без ограничения'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval с'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между проверками очереди в режиме --loop'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        while True:
+            started = time.monotonic()
+            sent = outbox.drain(options['batch_size'], options['rate'])
+            if sent or not options['loop']:
+                self.stdout.write(
+                    f'Отправлено писем: {sent} '
+                    f'за {time.monotonic() - started:.2f} с'
+                )
+            if not options['loop']:
+                return
+            connection.close()
+            time.sleep(options['interval'])
@@ -1,121 +1,332 @@
 import csv
 import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from itertools import islice
 
+from api.cache import bump_versions
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
 from reviews.models import (Category, Comment, Genre, GenreToTitle, Review,
                             Title)
 from users.models import User
 
+CsvTable = namedtuple('CsvTable', ('name', 'model', 'filename', 'columns'))
+
+# columns сопоставляет колонку .csv с полем модели. Порядок загрузки
+# строится по внешним ключам из этих полей, см. get_stages().
+TABLES = (
+    CsvTable('users', User, 'users.csv', {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    CsvTable('categories', Category, 'category.csv', {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    CsvTable('genres', Genre, 'genre.csv', {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    CsvTable('titles', Title, 'titles.csv', {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'category': 'category_id',
+    }),
+    CsvTable('genre_title', GenreToTitle, 'genre_title.csv', {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }),
+    CsvTable('reviews', Review, 'review.csv', {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }),
+    CsvTable('comments', Comment, 'comments.csv', {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }),
+)
+
+
+def read_chunks(path, batch_size):
+    """Читает .csv потоково, отдавая строки пачками по batch_size."""
+    with open(path, 'r', encoding='utf-8', newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        while True:
+            chunk = list(islice(reader, batch_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def get_foreign_keys(table):
+    """Возвращает {поле модели: модель, на которую оно ссылается}."""
+    return {
+        field.attname: field.related_model
+        for field in table.model._meta.concrete_fields
+        if field.many_to_one and field.attname in table.columns.values()
+    }
+
+
+def get_stages(tables):
+    """
+    Разбивает таблицы на этапы: таблицы одного этапа не ссылаются
+    друг на друга и могут загружаться одновременно.
+    """
+    by_model = {table.model: table.name for table in tables}
+    depends = {
+        table.name: {
+            by_model[model] for model in get_foreign_keys(table).values()
+            if model in by_model
+        }
+        for table in tables
+    }
+    stages, loaded, pending = [], set(), list(tables)
+    while pending:
+        stage = [
+            table for table in pending if depends[table.name] <= loaded
+        ]
+        if not stage:
+            raise CommandError(
+                'Циклическая зависимость между таблицами: '
+                + ', '.join(table.name for table in pending)
+            )
+        stages.append(stage)
+        loaded.update(table.name for table in stage)
+        pending = [table for table in pending if table not in stage]
+    return stages
+
+
+class TableStats:
+    """Счётчики загрузки одного файла, общие для всех потоков."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = self.created = self.skipped = 0
+        self.started = time.monotonic()
+        self.finished = self.started
+
+    def add(self, rows, created, skipped):
+        with self.lock:
+            self.rows += rows
+            self.created += created
+            self.skipped += skipped
+            self.finished = time.monotonic()
+
 
 class Command(BaseCommand):
     """Команда для внесения в БД информации из .csv:
-     python manage.py import_csv """
+     python manage.py import_csv [--batch-size N] [--jobs N]
+     [--ignore-conflicts | --update | --strict]
+
+    Повторный запуск безопасен: строки, id которых уже есть в базе,
+    по умолчанию пропускаются. """
 
     help = 'Загрузка информации из .csv файлов в базу данных'
 
-    def get_user_info(self):
-        with open(os.path.join(settings.BASE_DIR, 'static/data/users.csv'),
-                  'rt', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    User.objects.get_or_create(
-                        id=row[0],
-                        username=row[1],
-                        email=row[2],
-                        role=row[3],
-                        bio=row[4],
-                        first_name=row[5],
-                        last_name=row[6]
-                    )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static/data'),
+            help='Папка с .csv файлами'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк, загружаемых одной транзакцией'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Количество потоков загрузки'
+        )
+        conflicts = parser.add_mutually_exclusive_group()
+        conflicts.add_argument(
+            '--ignore-conflicts',
+            action='store_true',
+            help='Пропускать и строки, конфликтующие по уникальным полям'
+        )
+        conflicts.add_argument(
+            '--update',
+            action='store_true',
+            help='Обновлять строки, которые уже есть в базе'
+        )
+        conflicts.add_argument(
+            '--strict',
+            action='store_true',
+            help='Прерывать загрузку, если строка уже есть в базе'
+        )
 
-    def get_category_info(self):
-        with open(os.path.join(settings.BASE_DIR, 'static/data/category.csv'),
-                  'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    Category.objects.get_or_create(
-                        id=row[0],
-                        name=row[1],
-                        slug=row[2]
-                    )
+    def build_objects(self, table, rows):
+        """
+        Создаёт объекты модели, отбрасывая строки со ссылками на
+        отсутствующие записи. Проверка идёт по заранее загруженным id.
+        """
+        objects = []
+        foreign_keys = get_foreign_keys(table)
+        for row in rows:
+            values = {
+                field: row[column] for column, field in table.columns.items()
+            }
+            for field in foreign_keys:
+                values[field] = values[field] or None
+            if all(
+                values[field] is None
+                or int(values[field]) in self.known_ids[model]
+                for field, model in foreign_keys.items()
+            ):
+                objects.append(table.model(**values))
+        return objects
 
-    def get_genre_info(self):
-        with open(os.path.join(settings.BASE_DIR, 'static/data/genre.csv'),
-                  'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    Genre.objects.get_or_create(
-                        id=row[0],
-                        name=row[1],
-                        slug=row[2]
-                    )
+    def load_chunk(self, table, rows):
+        """Загружает пачку строк одной транзакцией."""
+        model = table.model
+        objects = self.build_objects(table, rows)
+        fields = [
+            model._meta.get_field(field)
+            for field in table.columns.values() if field != 'id'
+        ]
+        # auto_now_add перезаписывает даты в объектах при вставке, поэтому
+        # значения из файла запоминаем и возвращаем отдельным UPDATE.
+        auto_fields = [
+            field.name for field in fields
+            if getattr(field, 'auto_now_add', False)
+        ]
+        with self.write_lock, transaction.atomic():
+            existing = set(model.objects.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).values_list('pk', flat=True))
+            new = [obj for obj in objects if int(obj.pk) not in existing]
+            old = [obj for obj in objects if int(obj.pk) in existing]
+            if old and self.strict:
+                raise CommandError(
+                    f'{table.filename}: {len(old)} строк(и) уже есть в '
+                    'базе. Уберите --strict, чтобы пропустить их, или '
+                    'используйте --update.'
+                )
+            file_values = [
+                [getattr(obj, name) for name in auto_fields] for obj in new
+            ]
+            model.objects.bulk_create(
+                new, ignore_conflicts=self.ignore_conflicts
+            )
+            if auto_fields and new:
+                for obj, values in zip(new, file_values):
+                    for name, value in zip(auto_fields, values):
+                        setattr(obj, name, value)
+                model.objects.bulk_update(new, auto_fields)
+            if old and self.update:
+                model.objects.bulk_update(
+                    old, [field.name for field in fields]
+                )
+        skipped = len(rows) - len(objects)
+        if not self.update:
+            skipped += len(old)
+        return len(new), skipped
 
-    def get_titles_info(self):
-        with open(os.path.join(settings.BASE_DIR, 'static/data/titles.csv'),
-                  'rt', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    Title.objects.get_or_create(
-                        id=row[0],
-                        name=row[1],
-                        year=row[2],
-                        category_id=row[3]
-                    )
+    def run_chunk(self, table, rows, stats):
+        try:
+            created, skipped = self.load_chunk(table, rows)
+        except IntegrityError as error:
+            raise CommandError(f'{table.filename}: {error}')
+        finally:
+            if self.pool is not None:
+                # У каждого потока своё подключение к базе.
+                connection.close()
+        stats.add(len(rows), created, skipped)
+        if self.verbosity > 1:
+            self.stdout.write(f'{table.filename}: {stats.rows} строк...')
 
-    def get_genre_title_info(self):
-        with open(
-                os.path.join(settings.BASE_DIR, 'static/data/genre_title.csv'),
-                'r',
-                encoding='utf-8'
-        ) as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    GenreToTitle.objects.get_or_create(
-                        id=row[0],
-                        title_id=row[1],
-                        genre_id=row[2]
+    def preload_ids(self, tables):
+        """Запоминает id записей, на которые ссылаются таблицы этапа."""
+        for table in tables:
+            for model in get_foreign_keys(table).values():
+                if model not in self.known_ids:
+                    self.known_ids[model] = set(
+                        model.objects.values_list('pk', flat=True)
                     )
 
-    def get_review_info(self):
-        with open(os.path.join(settings.BASE_DIR, 'static/data/review.csv'),
-                  'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    Review.objects.get_or_create(
-                        id=row[0],
-                        title_id=row[1],
-                        text=row[2],
-                        author_id=row[3],
-                        score=row[4],
-                        pub_date=row[5]
+    def load_stage(self, tables):
+        self.preload_ids(tables)
+        stats = {table.name: TableStats() for table in tables}
+        futures = set()
+        for table in tables:
+            path = os.path.join(self.path, table.filename)
+            for chunk in read_chunks(path, self.batch_size):
+                if self.pool is None:
+                    self.run_chunk(table, chunk, stats[table.name])
+                    continue
+                # Ограничиваем число прочитанных, но не загруженных пачек,
+                # чтобы память не зависела от размера файла.
+                if len(futures) >= self.jobs * 2:
+                    done, futures = wait(
+                        futures, return_when='FIRST_COMPLETED'
                     )
+                    for future in done:
+                        future.result()
+                futures.add(self.pool.submit(
+                    self.run_chunk, table, chunk, stats[table.name]
+                ))
+        for future in wait(futures).done:
+            future.result()
+        for table in tables:
+            self.report_table(table, stats[table.name])
+            self.known_ids.pop(table.model, None)
 
-    def get_comments_info(self):
-        with open(os.path.join(settings.BASE_DIR, 'static/data/comments.csv'),
-                  'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            for row in reader:
-                if row[0] != 'id':
-                    Comment.objects.get_or_create(
-                        id=row[0],
-                        review_id=row[1],
-                        text=row[2],
-                        author_id=row[3],
-                        pub_date=row[4]
-                    )
+    def report_table(self, table, stats):
+        elapsed = stats.finished - stats.started
+        speed = stats.rows / elapsed if elapsed else stats.rows
+        self.stdout.write(
+            f'{table.filename}: {stats.rows} строк, новых {stats.created}, '
+            f'пропущено {stats.skipped}, '
+            f'{elapsed:.2f} с ({speed:.0f} строк/с)'
+        )
 
     def handle(self, *args, **options):
-        self.get_user_info()
-        self.get_category_info()
-        self.get_genre_info()
-        self.get_titles_info()
-        self.get_genre_title_info()
-        self.get_review_info()
-        self.get_comments_info()
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.jobs = options['jobs']
+        self.ignore_conflicts = options['ignore_conflicts']
+        self.update = options['update']
+        self.strict = options['strict']
+        self.verbosity = options['verbosity']
+        if self.batch_size < 1 or self.jobs < 1:
+            raise CommandError(
+                '--batch-size и --jobs должны быть больше нуля'
+            )
+        self.known_ids = {}
+        # SQLite не допускает параллельной записи: потоки по-прежнему
+        # готовят пачки одновременно, но пишут по очереди.
+        self.write_lock = (
+            threading.Lock() if connection.vendor == 'sqlite'
+            else nullcontext()
+        )
+        self.pool = (
+            ThreadPoolExecutor(max_workers=self.jobs) if self.jobs > 1
+            else None
+        )
+        timings = []
+        try:
+            for stage in get_stages(TABLES):
+                started = time.monotonic()
+                self.load_stage(stage)
+                timings.append((stage, time.monotonic() - started))
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+        for number, (stage, elapsed) in enumerate(timings, 1):
+            names = ', '.join(table.name for table in stage)
+            self.stdout.write(f'Этап {number} ({names}): {elapsed:.2f} с')
+        # bulk_create не вызывает сигналы, поэтому рейтинги, поисковый
+        # индекс, рейтинговые таблицы, активность и похожие произведения
+        # пересчитываются после загрузки.
+        call_command('rebuild_ratings', verbosity=0, stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_leaderboards', stdout=self.stdout)
+        call_command('compact_trending', stdout=self.stdout)
+        call_command('rebuild_similar_titles', stdout=self.stdout)
+        bump_versions('category', 'genre', 'title')
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.models import User, get_confirmation_code_setting
+
+
+class Command(BaseCommand):
+    """Команда для удаления просроченных кодов подтверждения:
+     python manage.py purge_confirmation_codes """
+
+    help = 'Удаление просроченных кодов подтверждения'
+
+    def handle(self, *args, **options):
+        expired = timezone.now() - timedelta(
+            seconds=get_confirmation_code_setting('TTL')
+        )
+        purged = User.objects.filter(
+            confirmation_code_issued_at__lt=expired
+        ).update(
+            confirmation_code=None,
+            confirmation_code_issued_at=None,
+            confirmation_attempts=0,
+        )
+        self.stdout.write(f'Удалено просроченных кодов: {purged}')
@@ -0,0 +1,34 @@
+from api.cache import bump_versions
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews import leaderboards
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта рейтинговых таблиц произведений:
+     python manage.py rebuild_leaderboards [--batch-size N] """
+
+    help = 'Пересчёт средней оценки и мест произведений в рейтингах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество произведений, пересчитываемых за раз'
+        )
+
+    def handle(self, *args, **options):
+        mean = leaderboards.get_mean(refresh=True)
+        ids = list(Title.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(ids), options['batch_size']):
+            batch = ids[start:start + options['batch_size']]
+            with transaction.atomic():
+                leaderboards.sync_boards(batch, mean)
+                leaderboards.update_scores(batch, mean)
+        bump_versions('title')
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано произведений: {len(ids)}, '
+            f'средняя оценка: {mean:.2f}'
+        ))
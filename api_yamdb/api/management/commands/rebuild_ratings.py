@@ -0,0 +1,128 @@
+from api.cache import bump_versions
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from reviews import stats
+from reviews.models import SCORES, Review, ScoreHistogram, Title
+
+# Сколько версий менять одним запросом: имена уходят параметрами IN.
+VERSIONS_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта рейтингов и распределений оценок
+     произведений по отзывам:
+     python manage.py rebuild_ratings [--dry-run] """
+
+    help = 'Пересчёт сохранённых рейтингов и распределений оценок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, не исправляя их'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество произведений в одном UPDATE'
+        )
+
+    def get_actual_stats(self):
+        stats = Review.objects.values('title').annotate(
+            rating_sum=Sum('score'),
+            rating_count=Count('id')
+        ).order_by()
+        return {
+            row['title']: (row['rating_sum'], row['rating_count'])
+            for row in stats
+        }
+
+    def bump_title_versions(self, title_ids):
+        """
+        bulk_update не вызывает сигналы, поэтому версии закэшированных
+        ответов с исправленными произведениями меняются здесь.
+        """
+        title_ids = list(title_ids)
+        if not title_ids:
+            return
+        for start in range(0, len(title_ids), VERSIONS_BATCH_SIZE):
+            bump_versions(*(
+                f'title:{title_id}'
+                for title_id in title_ids[start:start + VERSIONS_BATCH_SIZE]
+            ))
+        bump_versions('title')
+
+    def rebuild_histograms(self, options):
+        """Исправляет счётчики оценок; возвращает число исправленных."""
+        actual = stats.count_scores()
+        empty = [0] * len(SCORES)
+        stored = {
+            histogram.title_id: histogram
+            for histogram in ScoreHistogram.objects.all()
+        }
+        created, drifted = [], []
+        for title_id in Title.objects.values_list('id', flat=True):
+            counts = actual.get(title_id, empty)
+            histogram = stored.get(title_id)
+            if histogram is None:
+                histogram = ScoreHistogram(title_id=title_id)
+                created.append(histogram)
+            elif histogram.get_counts() != counts:
+                drifted.append(histogram)
+            else:
+                continue
+            for score, count in zip(SCORES, counts):
+                setattr(histogram, stats.get_field(score), count)
+        if not options['dry_run']:
+            with transaction.atomic():
+                ScoreHistogram.objects.bulk_create(
+                    created, batch_size=options['batch_size']
+                )
+                ScoreHistogram.objects.bulk_update(
+                    drifted, [stats.get_field(score) for score in SCORES],
+                    batch_size=options['batch_size']
+                )
+            # Статистика /titles/{id}/stats/ кэшируется по title:<id>.
+            self.bump_title_versions(
+                histogram.title_id for histogram in created + drifted
+            )
+        return len(created) + len(drifted)
+
+    def handle(self, *args, **options):
+        actual = self.get_actual_stats()
+        drifted = []
+        titles = Title.objects.only(
+            'id', 'rating_sum', 'rating_count', 'rating'
+        ).order_by('id')
+        for title in titles.iterator():
+            rating_sum, rating_count = actual.get(title.id, (0, 0))
+            rating = rating_sum / rating_count if rating_count else None
+            if (title.rating_sum, title.rating_count, title.rating) != (
+                rating_sum, rating_count, rating
+            ):
+                if options['verbosity'] > 0:
+                    self.stdout.write(
+                        f'Произведение {title.id}: '
+                        f'сумма {title.rating_sum} -> {rating_sum}, '
+                        f'количество {title.rating_count} -> {rating_count}'
+                    )
+                title.rating_sum = rating_sum
+                title.rating_count = rating_count
+                title.rating = rating
+                drifted.append(title)
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                Title.objects.bulk_update(
+                    drifted,
+                    ('rating_sum', 'rating_count', 'rating'),
+                    batch_size=options['batch_size']
+                )
+            self.bump_title_versions(title.id for title in drifted)
+        histograms = self.rebuild_histograms(options)
+        action = 'найдено' if options['dry_run'] else 'исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Расхождений {action}: {len(drifted)}, '
+            f'распределений оценок: {histograms}'
+        ))
@@ -0,0 +1,83 @@
+import time
+
+from api.cache import bump_versions
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews import search
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Команда для перестроения полнотекстового индекса:
+     python manage.py rebuild_search_index [--benchmark ЗАПРОС ...] """
+
+    help = 'Перестроение полнотекстового индекса и сравнение с icontains'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество объектов, индексируемых за раз'
+        )
+        parser.add_argument(
+            '--benchmark',
+            nargs='+',
+            metavar='QUERY',
+            help='Сравнить поиск по индексу с icontains на этих запросах'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз повторять каждый запрос при сравнении'
+        )
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Не перестраивать индекс, только сравнить'
+        )
+
+    def measure(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return (time.perf_counter() - started) / repeat * 1000, len(result)
+
+    def benchmark(self, queries, repeat):
+        for query in queries:
+            fts_ms, fts_count = self.measure(
+                lambda: search.search(query, kinds=('title',)), repeat
+            )
+            like_ms, like_count = self.measure(
+                lambda: list(Title.objects.filter(
+                    name__icontains=query
+                ).values_list('pk', flat=True)),
+                repeat
+            )
+            self.stdout.write(
+                f'"{query}": индекс {fts_ms:.2f} мс ({fts_count} шт.), '
+                f'icontains {like_ms:.2f} мс ({like_count} шт.)'
+            )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING(
+                'Полнотекстовый индекс для этой базы не поддерживается, '
+                'поиск работает через icontains.'
+            ))
+        elif not options['skip_rebuild']:
+            started = time.monotonic()
+            with transaction.atomic():
+                counts = search.rebuild_index(options['batch_size'])
+            # Закэшированные ответы ?search= собраны по старому индексу.
+            bump_versions('title')
+            elapsed = time.monotonic() - started
+            total = ', '.join(
+                f'{kind}: {count}' for kind, count in counts.items()
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Индекс перестроен за {elapsed:.2f} с ({total})'
+            ))
+        if options['benchmark']:
+            self.benchmark(options['benchmark'], options['repeat'])
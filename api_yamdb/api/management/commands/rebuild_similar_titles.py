@@ -0,0 +1,36 @@
+from api.cache import bump_versions
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews import recommendations
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта похожих произведений:
+     python manage.py rebuild_similar_titles [--chunk-size N] """
+
+    help = 'Пересчёт похожих произведений по оценкам общих авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=recommendations.get_setting('CHUNK_SIZE'),
+            help='Количество произведений, пересчитываемых за раз'
+        )
+
+    def handle(self, *args, **options):
+        norms = recommendations.get_norms()
+        ids = list(Title.objects.order_by('id').values_list('id', flat=True))
+        stored = 0
+        for start in range(0, len(ids), options['chunk_size']):
+            chunk = ids[start:start + options['chunk_size']]
+            neighbours = recommendations.find_similar(chunk, norms)
+            with transaction.atomic():
+                recommendations.store_similar(neighbours)
+            stored += sum(map(len, neighbours.values()))
+        bump_versions('similar')
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано произведений: {len(ids)}, '
+            f'похожих произведений: {stored}'
+        ))
@@ -0,0 +1,26 @@
+"""
+Счётчики для подбора настроек: попадания в кэш, отклонённые запросы
+и т.п. Хранятся в памяти процесса, у каждого воркера свои.
+"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: defaultdict(int))
+
+
+def increment(section, name, value=1):
+    with _lock:
+        _counters[section][name] += value
+
+
+def snapshot():
+    with _lock:
+        return {
+            section: dict(counters) for section, counters in _counters.items()
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,171 @@
+"""
+Очередь исходящих писем.
+
+Письмо сначала сохраняется в OutboxMessage, а отправляется после
+коммита транзакции, так что ответ на запрос не ждёт почтовый сервер.
+Способ отправки задаёт MAIL_OUTBOX['MODE']:
+- 'thread' — фоновый поток процесса, который будится новыми письмами;
+- 'command' — только команда drain_outbox (cron, отдельный воркер);
+- 'sync' — сразу после коммита в том же потоке, для тестов и отладки.
+Неудачные письма повторяются с экспоненциальной задержкой, скорость
+отправки ограничивается RATE_LIMIT писем в секунду.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.utils import timezone
+from users.models import OutboxMessage
+
+from . import metrics, utility
+
+logger = logging.getLogger('api.outbox')
+
+DEFAULTS = {
+    'MODE': 'thread',
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'LEASE': 300,
+    'POLL_INTERVAL': 60,
+    'RATE_LIMIT': 0,
+}
+
+_drain_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'MAIL_OUTBOX', {}).get(name, DEFAULTS[name])
+
+
+def enqueue(subject, body, recipients, from_email=None):
+    """Ставит письмо в очередь; отправка начнётся после коммита."""
+    message = OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        recipients=list(recipients),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+    metrics.increment('outbox', 'enqueued')
+    mode = get_setting('MODE')
+    if mode == 'sync':
+        transaction.on_commit(drain)
+    elif mode == 'thread':
+        transaction.on_commit(worker.wake)
+    return message
+
+
+def claim(batch_size):
+    """
+    Забирает пачку писем, которые пора отправить. Письма получают
+    аренду на LEASE секунд, чтобы их не взял другой отправитель.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+                sent_at__isnull=True,
+                next_attempt_at__lte=now,
+                attempts__lt=get_setting('MAX_ATTEMPTS'),
+            )[:batch_size]
+        )
+        OutboxMessage.objects.filter(
+            pk__in=[message.pk for message in messages]
+        ).update(next_attempt_at=now + timedelta(
+            seconds=get_setting('LEASE')
+        ))
+    return messages
+
+
+def retry(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    delay = get_setting('RETRY_DELAY') * 2 ** (message.attempts - 1)
+    message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    message.save(update_fields=('attempts', 'last_error', 'next_attempt_at'))
+    metrics.increment('outbox', 'failed')
+    logger.warning(
+        'Письмо %s не отправлено (попытка %s): %s',
+        message.pk, message.attempts, error
+    )
+
+
+def drain(batch_size=None, rate=None):
+    """
+    Отправляет все письма, которые пора отправить, пачками по одному
+    соединению с почтовым сервером. Возвращает число отправленных.
+    """
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    limiter = utility.RateLimiter(
+        get_setting('RATE_LIMIT') if rate is None else rate
+    )
+    sent = 0
+    started = time.perf_counter()
+    with _drain_lock:
+        while True:
+            messages = claim(batch_size)
+            if not messages:
+                break
+            errors = utility.send_mass_messages(
+                [get_email(message) for message in messages], limiter
+            )
+            delivered = []
+            for message, error in zip(messages, errors):
+                if error is None:
+                    delivered.append(message.pk)
+                else:
+                    retry(message, error)
+            OutboxMessage.objects.filter(pk__in=delivered).update(
+                sent_at=timezone.now()
+            )
+            sent += len(delivered)
+    if sent:
+        elapsed = time.perf_counter() - started
+        logger.info(
+            'Отправлено писем: %s за %.2f с (%.1f писем/с)',
+            sent, elapsed, sent / elapsed
+        )
+    return sent
+
+
+def get_email(message):
+    return EmailMessage(
+        message.subject, message.body, message.from_email, message.recipients
+    )
+
+
+class OutboxWorker:
+    """Фоновый поток, отправляющий письма из очереди."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def wake(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='outbox', daemon=True
+                )
+                self.thread.start()
+        self.event.set()
+
+    def run(self):
+        while True:
+            self.event.wait(get_setting('POLL_INTERVAL'))
+            self.event.clear()
+            try:
+                drain()
+            except Exception:
+                logger.exception('Ошибка при отправке писем из очереди')
+            finally:
+                # У потока своё подключение к базе.
+                connection.close()
+
+
+worker = OutboxWorker()
@@ -0,0 +1,30 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная пагинация по дате публикации с доворотом по id."""
+    ordering = ('pub_date', 'id')
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по умолчанию. С параметром ?pagination=cursor
+    переключается на курсорную: без COUNT(*) и OFFSET, поэтому дальние
+    страницы отдаются так же быстро, как первая.
+    """
+    mode_query_param = 'pagination'
+    cursor_paginator_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.cursor_paginator = self.cursor_paginator_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
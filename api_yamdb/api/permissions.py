@@ -29,7 +29,7 @@ class AuthorOrAdminOrModeratorReviewComment(BasePermission):
     def has_object_permission(self, request, view, obj):
         return (request.method in SAFE_METHODS
                 or (request.user.role in ['admin', 'moderator'])
-                or obj.author == request.user)
+                or obj.author_id == request.user.id)
 
 
 class IsAdminOrIsSuperuser(BasePermission):
@@ -0,0 +1,183 @@
+"""
+Профилирование запросов: число SQL-запросов, время в базе, во view
+и в сериализаторах. Результат отдаётся в заголовке Server-Timing и,
+по желанию, строкой лога. Профилируется доля запросов SAMPLE_RATE,
+остальные проходят без накладных расходов.
+
+Повторяющийся SQL (N+1) ищется по тексту запроса без параметров:
+когда один и тот же запрос выполняется DUPLICATE_THRESHOLD раз, по
+стеку вызовов определяется поле сериализатора, которое его вызвало.
+"""
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+from . import metrics
+
+logger = logging.getLogger('api.profiling')
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.0,
+    'LOG': False,
+    'DUPLICATE_THRESHOLD': 3,
+}
+
+_local = threading.local()
+
+
+def get_setting(name):
+    return getattr(settings, 'API_PROFILING', {}).get(name, DEFAULTS[name])
+
+
+def get_current():
+    """Профиль текущего запроса или None, если запрос не профилируется."""
+    return getattr(_local, 'profile', None)
+
+
+def find_serializer_field():
+    """Возвращает 'Сериализатор.поле', из которого выполняется запрос."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        field = frame.f_locals.get('self')
+        if isinstance(field, serializers.Field) and field.field_name:
+            return f'{type(field.parent).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+class RequestProfile:
+    """Собирает замеры одного запроса; используется как контекст."""
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold or get_setting('DUPLICATE_THRESHOLD')
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.view_time = 0.0
+        self.view_started = None
+        self.statements = Counter()
+        self.duplicates = {}
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        _local.profile = self
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.total_time = time.perf_counter() - self.started
+        _local.profile = None
+        self.stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+            count = self.statements[sql]
+            if count == self.threshold:
+                self.duplicates[sql] = {
+                    'field': find_serializer_field(), 'count': count
+                }
+            elif count > self.threshold:
+                self.duplicates[sql]['count'] = count
+
+    def timed(self, attribute, func):
+        """Оборачивает func, добавляя время её работы к attribute."""
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                setattr(
+                    self, attribute,
+                    getattr(self, attribute) + time.perf_counter() - started
+                )
+        return wrapper
+
+    def get_server_timing(self):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'view;dur={self.view_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ))
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'view_ms': round(self.view_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+            'duplicates': list(self.duplicates.values()),
+        }
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует долю запросов, заданную в API_PROFILING. Стоит последним
+    в MIDDLEWARE: тогда время view не включает остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= get_setting('SAMPLE_RATE'):
+            return self.get_response(request)
+        with RequestProfile() as profile:
+            response = self.get_response(request)
+            if profile.view_started is not None:
+                profile.view_time = time.perf_counter() - profile.view_started
+        response['Server-Timing'] = profile.get_server_timing()
+        metrics.increment('profiling', 'sampled')
+        if profile.duplicates:
+            metrics.increment('profiling', 'duplicate_queries')
+        if get_setting('LOG'):
+            level = logging.WARNING if profile.duplicates else logging.INFO
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                **profile.as_dict(),
+            }, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = get_current()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+
+
+class ProfiledViewMixin:
+    """
+    Хук DRF: засекает время сериализации и валидации у сериализаторов,
+    созданных через get_serializer().
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        profile = get_current()
+        if profile is not None:
+            serializer.to_representation = profile.timed(
+                'serializer_time', serializer.to_representation
+            )
+            serializer.run_validation = profile.timed(
+                'serializer_time', serializer.run_validation
+            )
+        return serializer
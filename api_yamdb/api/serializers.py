@@ -1,11 +1,13 @@
 from django.contrib.auth.validators import UnicodeUsernameValidator
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
+from .batch import METHODS, get_setting
 from .utility import (generate_confirmation_code,
                       send_email_with_verification_code)
 
@@ -30,7 +32,7 @@ class TitleSerializerRead(serializers.ModelSerializer):
     """Сериализатор для работы с произведениями только при чтении."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -39,9 +41,38 @@ class TitleSerializerRead(serializers.ModelSerializer):
         )
         read_only_fields = ('id',)
 
-    def get_rating(self, obj):
-        obj = obj.reviews.all().aggregate(rating=Avg('score'))
-        return obj['rating']
+
+class TopTitleSerializer(TitleSerializerRead):
+    """Сериализатор для произведений из рейтинговой таблицы."""
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializerRead.Meta):
+        fields = TitleSerializerRead.Meta.fields + ('score',)
+
+
+class SimilarTitleSerializer(TitleSerializerRead):
+    """Сериализатор для похожих произведений."""
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializerRead.Meta):
+        fields = TitleSerializerRead.Meta.fields + ('similarity',)
+
+
+class TrendingTitleSerializer(TitleSerializerRead):
+    """Сериализатор для популярных сейчас произведений."""
+    activity = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializerRead.Meta):
+        fields = TitleSerializerRead.Meta.fields + ('activity',)
+
+
+class TitleStatsSerializer(serializers.Serializer):
+    """Сериализатор для статистики оценок произведения."""
+    count = serializers.IntegerField()
+    mean = serializers.FloatField(allow_null=True)
+    median = serializers.FloatField(allow_null=True)
+    stddev = serializers.FloatField(allow_null=True)
+    histogram = serializers.ListField(child=serializers.IntegerField())
 
 
 class TitleSerializerCreate(serializers.ModelSerializer):
@@ -60,6 +91,20 @@ class TitleSerializerCreate(serializers.ModelSerializer):
         model = Title
         fields = ('id', 'name', 'description', 'year', 'category', 'genre')
 
+    def update(self, instance, validated_data):
+        """
+        Сохраняет только переданные поля: счётчики рейтинга в загруженном
+        экземпляре могли устареть, пока параллельно менялись отзывы.
+        """
+        genres = validated_data.pop('genre', None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=validated_data)
+        if genres is not None:
+            instance.genre.set(genres)
+        return instance
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для работы с отзывами."""
@@ -78,11 +123,11 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         request = self.context['request']
-        author = request.user
         title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
         if request.method == 'POST':
-            if title.reviews.select_related('title').filter(author=author):
+            if Review.objects.filter(
+                title_id=title_id, author_id=request.user.id
+            ).exists():
                 raise ValidationError(
                     'Отзыв можно оставить только один раз!'
                 )
@@ -104,6 +149,23 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('id', 'review', 'author', 'text', 'pub_date')
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('review_as_id'):
+            fields['review'] = serializers.PrimaryKeyRelatedField(
+                read_only=True
+            )
+        return fields
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Сериализатор для результатов полнотекстового поиска."""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    review_id = serializers.IntegerField(allow_null=True)
+    text = serializers.CharField()
+
 
 class AdminUserSerializer(serializers.ModelSerializer):
     """Сериализатор для админа."""
@@ -181,35 +243,82 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class ConfirmationCodeSerializer(serializers.ModelSerializer):
-    """Сериализатор для получения кода подтверждения."""
+    """
+    Сериализатор для получения кода подтверждения. Пользователи с тем же
+    username или email читаются из базы один раз, см. get_users().
+    """
     username = serializers.CharField(
         max_length=150,
-        validators=[
-            UniqueValidator(queryset=User.objects.all()),
-            UnicodeUsernameValidator()
-        ]
-    )
-    email = serializers.EmailField(
-        max_length=254,
-        validators=[UniqueValidator(queryset=User.objects.all())]
+        validators=[UnicodeUsernameValidator()]
     )
+    email = serializers.EmailField(max_length=254)
 
     class Meta:
         fields = ('email', 'username')
         model = User
-        validators = (
-            UniqueTogetherValidator(
-                queryset=User.objects.all(),
-                fields=['username', 'email']
-            ),
+
+    def get_users(self):
+        """Пользователи, у которых совпадает username или email."""
+        if not hasattr(self, '_users'):
+            username, email = self.get_initial_credentials()
+            self._users = list(User.objects.filter(
+                Q(username=username) | Q(email=email)
+            ).only('id', 'username', 'email')[:2]) if username or email else []
+        return self._users
+
+    def get_initial_credentials(self):
+        data = self.initial_data if hasattr(self.initial_data, 'get') else {}
+        return tuple(
+            value if isinstance(value, str) else None
+            for value in (data.get('username'), data.get('email'))
         )
 
+    def get_registered_user(self):
+        """Пользователь с этими username и email, если он уже есть."""
+        credentials = self.get_initial_credentials()
+        for user in self.get_users():
+            if (user.username, user.email) == credentials:
+                return user
+        return None
+
+    def validate(self, data):
+        errors = {}
+        for user in self.get_users():
+            if user.username == data['username']:
+                errors['username'] = (
+                    'Пользователь с таким username уже существует.'
+                )
+            if user.email == data['email']:
+                errors['email'] = 'Пользователь с таким email уже существует.'
+        if errors:
+            raise ValidationError(errors)
+        return data
+
     def create(self, validated_data):
-        validated_data['confirmation_code'] = generate_confirmation_code()
-        user = User.objects.create_user(**validated_data)
-        send_email_with_verification_code(validated_data)
+        user = User(**validated_data)
+        user.email = User.objects.normalize_email(user.email)
+        user.set_unusable_password()
+        self.send_code(user)
         return user
 
+    @transaction.atomic
+    def send_code(self, user):
+        """
+        Выдаёт пользователю новый код подтверждения и ставит письмо с ним
+        в очередь. Новый пользователь сохраняется вместе с кодом.
+        """
+        code = generate_confirmation_code()
+        user.set_confirmation_code(code)
+        if user.pk is None:
+            user.save()
+        else:
+            user.save(update_fields=User.CONFIRMATION_FIELDS)
+        send_email_with_verification_code({
+            'username': user.username,
+            'email': user.email,
+            'confirmation_code': code,
+        })
+
     def validate_username(self, value):
         if value == 'me':
             raise serializers.ValidationError('А username не может быть "me"')
@@ -229,12 +338,37 @@ class AccessTokenSerializer(serializers.Serializer):
 
     def validate(self, data):
         user = get_object_or_404(User, username=data['username'])
-        user_1 = User.objects.filter(
-            username=user.username,
-            confirmation_code=data['confirmation_code']
-        ).exists()
-        if not user_1:
+        error = user.get_confirmation_code_error()
+        if error is None and not user.claim_confirmation_attempt():
+            error = 'Слишком много попыток, запросите новый код.'
+        if error is not None:
+            raise serializers.ValidationError(error)
+        if not user.check_confirmation_code(data['confirmation_code']):
+            raise serializers.ValidationError('Неверный код подтверждения.')
+        if not user.consume_confirmation_code():
             raise serializers.ValidationError(
-                'Такого пользователя нет.'
+                'Код подтверждения уже использован, запросите новый.'
             )
+        data['user'] = user
         return data
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """Один запрос из пакета."""
+    method = serializers.ChoiceField(choices=METHODS)
+    path = serializers.RegexField(r'^/api/v1/', max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Сериализатор для пакета запросов."""
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = get_setting('MAX_REQUESTS')
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f'В пакете может быть не больше {limit} запросов.'
+            )
+        return value
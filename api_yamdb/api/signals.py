@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, Genre, GenreToTitle, Review,
+                            Title)
+from users.models import User
+
+from .authentication import forget_token_version
+from .cache import bump_versions
+
+
+def get_stale_versions(instance):
+    """
+    Версии ответов, которые устаревают при изменении объекта.
+    В произведении выводятся категория, жанры и рейтинг из отзывов,
+    в отзывах — название произведения, в комментариях — текст отзыва.
+    Общая версия 'comments' — для ответов со встроенными комментариями,
+    'user' — для имён авторов отзывов и комментариев.
+    """
+    if isinstance(instance, (Category, Genre)):
+        return (instance._meta.model_name, 'title')
+    if isinstance(instance, Title):
+        return ('title', f'title:{instance.pk}')
+    if isinstance(instance, GenreToTitle):
+        return ('title', f'title:{instance.title_id}')
+    if isinstance(instance, Review):
+        return (
+            'title', f'title:{instance.title_id}',
+            f'reviews:{instance.title_id}', f'comments:{instance.pk}'
+        )
+    if isinstance(instance, Comment):
+        return (f'comments:{instance.review_id}', 'comments')
+    if isinstance(instance, User):
+        # Регистрация и новый код подтверждения имени не меняют, а
+        # отзывы и комментарии удалённого пользователя удаляются вместе
+        # с ним и сами меняют свои версии.
+        claims = getattr(instance, '_token_claims', {})
+        if claims.get('username', instance.username) != instance.username:
+            return ('user',)
+    return ()
+
+
+def bump_versions_on_commit(*names):
+    """
+    Меняет версии после фиксации транзакции: иначе параллельный запрос
+    мог бы закэшировать ещё старые данные под новой версией.
+    """
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_versions(sender, instance, **kwargs):
+    names = get_stale_versions(instance)
+    if names:
+        bump_versions_on_commit(*names)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    titles = (pk_set or ()) if reverse else (instance.pk,)
+    bump_versions_on_commit('title', *(f'title:{pk}' for pk in titles))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_token_version(sender, instance, **kwargs):
+    # Другие воркеры перечитают версию через LOCAL_TIMEOUT секунд.
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_token_version(user_id))
@@ -0,0 +1,237 @@
+"""
+Ограничение частоты запросов алгоритмом token bucket.
+
+В ведре помещается N жетонов (rate 'N/период'), каждый запрос забирает
+один, жетоны восполняются равномерно — N за период. Состояние ведра —
+пара (жетоны, время обновления), поэтому проверка стоит O(1) в любом
+хранилище:
+- LocalMemoryStore — память процесса, у каждого воркера свои счётчики;
+- CacheStore — кэш Django (общий для воркеров при Redis/Memcached);
+- SQLiteStore — файл SQLite, общий для процессов на одной машине.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+DEFAULTS = {
+    'ENABLED': True,
+    'STORE': 'api.throttling.LocalMemoryStore',
+    'OPTIONS': {},
+    'RATES': {},
+}
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'API_THROTTLING', {}).get(name, DEFAULTS[name])
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 10 / 60): ёмкость ведра и жетонов в секунду."""
+    count, period = rate.split('/')
+    return int(count), int(count) / PERIODS[period[0]]
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = import_string(get_setting('STORE'))(
+                **get_setting('OPTIONS')
+            )
+        return _store
+
+
+def reset_store():
+    """Забывает хранилище и его счётчики, например после смены настроек."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.clear()
+        _store = None
+
+
+class BaseStore(ABC):
+    """Хранилище вёдер: get/set состояния под блокировкой lock()."""
+
+    def lock(self):
+        return nullcontext()
+
+    @abstractmethod
+    def get(self, key):
+        """Состояние ведра (жетоны, время обновления) или None."""
+
+    @abstractmethod
+    def set(self, key, state, timeout):
+        """Сохраняет состояние; через timeout секунд ведро полное."""
+
+    @abstractmethod
+    def clear(self):
+        """Удаляет все вёдра."""
+
+    def consume(self, key, capacity, rate):
+        """
+        Забирает жетон из ведра key. Возвращает (разрешено, через сколько
+        секунд появится следующий жетон).
+        """
+        with self.lock():
+            now = time.time()
+            tokens, updated = self.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Полное ведро можно не хранить: оно равно отсутствующему.
+            self.set(key, (tokens, now), (capacity - tokens) / rate)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+class LocalMemoryStore(BaseStore):
+    """Вёдра в памяти процесса; давно не использованные вытесняются."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lock(self):
+        return self._lock
+
+    def get(self, key):
+        return self.buckets.get(key)
+
+    def set(self, key, state, timeout):
+        self.buckets[key] = state
+        self.buckets.move_to_end(key)
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.buckets.clear()
+
+
+class CacheStore(BaseStore):
+    """
+    Вёдра в кэше Django. Чтение и запись не атомарны, поэтому при
+    одновременных запросах лимит может быть превышен на единицы.
+    """
+    prefix = 'api-throttle'
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(f'{self.prefix}:{key}')
+
+    def set(self, key, state, timeout):
+        self.cache.set(f'{self.prefix}:{key}', state, max(1, int(timeout)))
+
+    def clear(self):
+        # Записи истекают сами, когда ведро наполняется.
+        pass
+
+
+class SQLiteStore(BaseStore):
+    """Вёдра в файле SQLite; BEGIN IMMEDIATE делает проверку атомарной."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        with self.connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL, updated REAL)'
+            )
+
+    def connect(self):
+        if not hasattr(self.local, 'connection'):
+            self.local.connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+        return self.local.connection
+
+    @contextmanager
+    def lock(self):
+        connection = self.connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def get(self, key):
+        return self.connect().execute(
+            'SELECT tokens, updated FROM buckets WHERE key = ?', (key,)
+        ).fetchone()
+
+    def set(self, key, state, timeout):
+        self.connect().execute(
+            'INSERT OR REPLACE INTO buckets (key, tokens, updated) '
+            'VALUES (?, ?, ?)', (key, *state)
+        )
+
+    def clear(self):
+        self.connect().execute('DELETE FROM buckets')
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничивает запросы методами из methods по частоте
+    API_THROTTLING['RATES'][scope]. Ключ — пользователь, а для
+    анонимных запросов — IP-адрес: REMOTE_ADDR или, за прокси,
+    адрес из X-Forwarded-For по REST_FRAMEWORK['NUM_PROXIES'].
+    """
+    scope = None
+    methods = ('POST',)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        rate = get_setting('RATES').get(self.scope)
+        if (
+            not get_setting('ENABLED') or rate is None
+            or request.method not in self.methods
+        ):
+            return True
+        capacity, per_second = parse_rate(rate)
+        allowed, self.wait_time = get_store().consume(
+            self.get_cache_key(request, view), capacity, per_second
+        )
+        if not allowed:
+            metrics.increment('throttling', f'{self.scope}_rejected')
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthRateThrottle(TokenBucketThrottle):
+    """Регистрация, повторный запрос кода и получение токена."""
+    scope = 'auth'
+    methods = ('POST', 'PUT', 'PATCH')
+
+
+class WriteRateThrottle(TokenBucketThrottle):
+    """Создание отзывов и комментариев."""
+    scope = 'write'
@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, SignUpViewSet, TitleViewSet, UserViewSet,
-                    access_token)
+                    ReviewViewSet, SearchViewSet, SignUpViewSet, TitleViewSet,
+                    UserViewSet, access_token, batch, metrics)
 
 app_name = 'api'
 
@@ -34,10 +34,13 @@ router_v1.register(
     CommentViewSet,
     basename='comments'
 )
+router_v1.register('search', SearchViewSet, basename='search')
 router_v1.register('users', UserViewSet, basename='users')
 router_v1.register('auth/signup', SignUpViewSet)
 
 urlpatterns = [
     path('', include(router_v1.urls)),
     path('auth/token/', access_token, name='token'),
+    path('metrics/', metrics, name='metrics'),
+    path('batch/', batch, name='batch'),
 ]
@@ -1,13 +1,17 @@
-import random
+import secrets
+import time
 
-from django.core.mail import send_mail
+from django.core.mail import get_connection
+
+from . import metrics, outbox
 
 
 def generate_confirmation_code():
-    return ''.join([str(random.randint(0, 9)) for _ in range(6)])
+    return ''.join(secrets.choice('0123456789') for _ in range(6))
 
 
 def send_email_with_verification_code(data):
+    """Ставит письмо с кодом подтверждения в очередь отправки."""
     username = data['username']
     recipients = (data['email'], )
     mailer = 'from@example.com'
@@ -18,4 +22,57 @@ def send_email_with_verification_code(data):
         f'<b>{confirmation_code}</b>.\nЧтоб получить токен, отправьте запрос\n'
         'с полями username и confirmation_code на /api/v1/auth/token/.'
     )
-    send_mail(subject, message, mailer, recipients)
+    outbox.enqueue(subject, message, recipients, mailer)
+
+
+class RateLimiter:
+    """Не даёт отправлять больше rate писем в секунду; 0 — без ограничения."""
+
+    def __init__(self, rate=0):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at = max(self.next_at, now) + self.interval
+
+
+def send_mass_messages(messages, limiter=None, connection=None):
+    """
+    Отправляет EmailMessage через одно соединение, как send_mass_mail,
+    но ошибка одного письма не прерывает остальные. Возвращает список
+    ошибок в порядке messages: None для отправленных писем.
+    """
+    limiter = limiter or RateLimiter()
+    connection = connection or get_connection()
+    started = time.perf_counter()
+    try:
+        connection.open()
+    except Exception as error:
+        errors = [error] * len(messages)
+    else:
+        errors = []
+        try:
+            for message in messages:
+                limiter.wait()
+                message.connection = connection
+                try:
+                    message.send()
+                except Exception as error:
+                    errors.append(error)
+                else:
+                    errors.append(None)
+        finally:
+            connection.close()
+    failed = sum(error is not None for error in errors)
+    metrics.increment('mail', 'batches')
+    metrics.increment('mail', 'sent', len(errors) - failed)
+    metrics.increment('mail', 'failed', failed)
+    metrics.increment(
+        'mail', 'send_ms', round((time.perf_counter() - started) * 1000)
+    )
+    return errors
@@ -1,24 +1,45 @@
+from django.db import transaction
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews import (leaderboards, recommendations, search, stats,
+                     trending)
+from reviews.models import (SCORES, Category, Comment, Genre, Review,
+                            ScoreHistogram, Title, User)
 
+from . import batch as api_batch
+from . import metrics as api_metrics
+from .authentication import get_token_for_user
+from .cache import VersionedListMixin, VersionedResponseMixin
+from .expand import ExpandMixin
+from .fieldsets import SparseFieldsetsMixin
 from .filters import TitleFilter
+from .pagination import PageOrCursorPagination
 from .permissions import (AuthorOrAdminOrModeratorReviewComment,
                           IsAdminOrIsSuperuser,
                           IsAdminOrIsSuperuserTitleCategoryGenre)
+from .profiling import ProfiledViewMixin
 from .serializers import (AccessTokenSerializer, AdminUserSerializer,
-                          CategorySerializer, CommentSerializer,
+                          BatchSerializer, CategorySerializer,
+                          CommentSerializer,
                           ConfirmationCodeSerializer, GenreSerializer,
-                          ReviewSerializer, TitleSerializerCreate,
-                          TitleSerializerRead, UserSerializer)
+                          ReviewSerializer, SearchResultSerializer,
+                          SimilarTitleSerializer, TitleSerializerCreate,
+                          TitleSerializerRead, TitleStatsSerializer,
+                          TopTitleSerializer, TrendingTitleSerializer,
+                          UserSerializer)
+from .throttling import AuthRateThrottle, WriteRateThrottle
 
 
 class CreateDestroyViewSet(
+    ProfiledViewMixin,
+    SparseFieldsetsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -27,23 +48,167 @@ class CreateDestroyViewSet(
     pass
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ProfiledViewMixin, SparseFieldsetsMixin, ExpandMixin,
+                   VersionedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с произведениями."""
-    queryset = Title.objects.all().order_by('name')
+    queryset = Title.objects.order_by('name')
+    select_related_fields = {'category': 'category'}
+    prefetch_related_fields = {'genre': 'genre'}
+    expandable = ('reviews', 'reviews.comments')
+    expand_actions = ('retrieve',)
     serializer_class = TitleSerializerCreate
     permission_classes = (IsAdminOrIsSuperuserTitleCategoryGenre,)
     pagination_class = PageNumberPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    lookup_value_regex = r'\d+'
 
     def get_serializer_class(self):
+        if self.action == 'top':
+            return TopTitleSerializer
+        if self.action == 'stats':
+            return TitleStatsSerializer
+        if self.action == 'similar':
+            return SimilarTitleSerializer
+        if self.action == 'trending_titles':
+            return TrendingTitleSerializer
         if self.request.method in ('POST', 'PATCH', 'DELETE',):
             return TitleSerializerCreate
         return TitleSerializerRead
 
+    def get_cache_versions(self):
+        if self.action == 'stats':
+            return (f'title:{self.kwargs["pk"]}',)
+        if self.action == 'similar':
+            return ('title', 'category', 'genre', 'similar')
+        if self.action != 'retrieve':
+            return ('title', 'category', 'genre')
+        title_id = self.kwargs['pk']
+        versions = (f'title:{title_id}', 'category', 'genre')
+        expand = self.get_expand()
+        if expand:
+            versions += (f'reviews:{title_id}', 'user')
+        if 'reviews.comments' in expand:
+            versions += ('comments',)
+        return versions
 
-class CategoryViewSet(CreateDestroyViewSet):
+    def get_board(self):
+        params = self.request.query_params
+        if params.get('category'):
+            category = get_object_or_404(
+                Category.objects.only('id'), slug=params['category']
+            )
+            return leaderboards.get_board(category_id=category.pk)
+        if params.get('genre'):
+            genre = get_object_or_404(
+                Genre.objects.only('id'), slug=params['genre']
+            )
+            return leaderboards.get_board(genre_id=genre.pk)
+        return leaderboards.get_board()
+
+    def get_limit(self, size):
+        limit = self.request.query_params.get('limit', size)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= size:
+            raise ValidationError(
+                {'limit': f'Укажите число от 1 до {size}.'}
+            )
+        return limit
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """
+        Лучшие произведения по взвешенному рейтингу: всего, в категории
+        (?category=slug) или в жанре (?genre=slug).
+        """
+        return self.get_versioned_response(self.get_top, request)
+
+    def get_top(self, request):
+        ranks = leaderboards.get_top(
+            self.get_board(),
+            self.get_limit(leaderboards.get_setting('SIZE'))
+        ).select_related('title__category').prefetch_related('title__genre')
+        titles = []
+        for rank in ranks:
+            rank.title.score = rank.score
+            titles.append(rank.title)
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def get_window(self):
+        windows = trending.get_setting('WINDOWS')
+        window = self.request.query_params.get(
+            'window', trending.get_setting('DEFAULT_WINDOW')
+        )
+        if window not in windows:
+            raise ValidationError(
+                {'window': f'Выберите одно из окон: {", ".join(windows)}.'}
+            )
+        return window
+
+    @action(detail=False, url_path='trending')
+    def trending_titles(self, request):
+        """
+        Популярные сейчас произведения по затухающей активности отзывов и
+        комментариев в окне ?window=24h.
+        """
+        moment = timezone.now()
+        window = self.get_window()
+        scores = trending.get_trending(
+            window, self.get_limit(trending.get_setting('SIZE')), moment
+        ).select_related('title__category').prefetch_related('title__genre')
+        titles = []
+        for score in scores:
+            score.title.activity = trending.get_activity(
+                score.score, window, moment
+            )
+            titles.append(score.title)
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True)
+    def stats(self, request, pk):
+        """Количество, среднее, медиана, отклонение и распределение оценок."""
+        return self.get_versioned_response(self.get_stats, request, pk)
+
+    def get_stats(self, request, pk):
+        histogram = ScoreHistogram.objects.filter(title_id=pk).first()
+        if histogram is not None:
+            counts = histogram.get_counts()
+        else:
+            # Счётчики ещё не построены командой rebuild_ratings.
+            get_object_or_404(Title.objects.only('id'), pk=pk)
+            counts = stats.count_scores([pk]).get(int(pk), [0] * len(SCORES))
+        serializer = self.get_serializer(stats.describe(counts))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        """Произведения, которые оценили авторы отзывов на это."""
+        return self.get_versioned_response(self.get_similar, request, pk)
+
+    def get_similar(self, request, pk):
+        neighbours = recommendations.get_similar(
+            pk, self.get_limit(recommendations.get_setting('SIZE'))
+        ).select_related(
+            'similar__category'
+        ).prefetch_related('similar__genre')
+        titles = []
+        for neighbour in neighbours:
+            neighbour.similar.similarity = neighbour.score
+            titles.append(neighbour.similar)
+        if not titles:
+            get_object_or_404(Title.objects.only('id'), pk=pk)
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class CategoryViewSet(VersionedListMixin, CreateDestroyViewSet):
     """Вьюсет для работы с категориями произведений."""
+    cache_versions = ('category',)
     queryset = Category.objects.all().order_by('name')
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrIsSuperuserTitleCategoryGenre,)
@@ -52,8 +217,9 @@ class CategoryViewSet(CreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateDestroyViewSet):
+class GenreViewSet(VersionedListMixin, CreateDestroyViewSet):
     """Вьюсет для работы  жанрами."""
+    cache_versions = ('genre',)
     queryset = Genre.objects.all().order_by('name')
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrIsSuperuserTitleCategoryGenre,)
@@ -62,39 +228,152 @@ class GenreViewSet(CreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ProfiledViewMixin, SparseFieldsetsMixin, ExpandMixin,
+                    VersionedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с отзывами."""
+    select_related_fields = {'author': 'author'}
+    sparse_required = ('pub_date',)
+    expandable = ('comments',)
+    expand_actions = ('list',)
     serializer_class = ReviewSerializer
     permission_classes = (AuthorOrAdminOrModeratorReviewComment,)
+    throttle_classes = (WriteRateThrottle,)
+    pagination_class = PageOrCursorPagination
+    cache_responses = False
+
+    def get_cache_versions(self):
+        title_id = self.kwargs['title_id']
+        versions = (f'reviews:{title_id}', f'title:{title_id}', 'user')
+        if self.get_expand():
+            versions += ('comments',)
+        return versions
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        return title.reviews.all()
+        title = get_object_or_404(
+            Title.objects.only('id', 'name'), id=self.kwargs['title_id']
+        )
+        # Произведение подставляется в отзывы связанным менеджером,
+        # автор загружается тем же запросом, см. select_related_fields.
+        return title.reviews.only(
+            'id', 'text', 'score', 'pub_date', 'title_id', 'author__username'
+        )
 
+    @transaction.atomic
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author_id=self.request.user.id, title=title)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ProfiledViewMixin, SparseFieldsetsMixin,
+                     VersionedResponseMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с комментариями."""
+    select_related_fields = {'author': 'author'}
+    sparse_required = ('pub_date',)
     serializer_class = CommentSerializer
     permission_classes = (AuthorOrAdminOrModeratorReviewComment,)
-    pagination_class = PageNumberPagination
+    throttle_classes = (WriteRateThrottle,)
+    pagination_class = PageOrCursorPagination
+    cache_responses = False
+
+    def get_cache_versions(self):
+        return (f'comments:{self.kwargs["review_id"]}', 'user')
+
+    def review_as_id(self):
+        """С ?review=id отзыв выводится id, а не полным текстом."""
+        return self.request.query_params.get('review') == 'id'
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['review_as_id'] = self.review_as_id()
+        return context
 
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs['review_id'])
-        return review.comments.all()
+        reviews = Review.objects.all()
+        if self.review_as_id():
+            reviews = reviews.only('id', 'title_id')
+        review = get_object_or_404(reviews, id=self.kwargs['review_id'])
+        return review.comments.only(
+            'id', 'text', 'pub_date', 'review_id', 'author__username'
+        )
 
     def perform_create(self, serializer):
         review = get_object_or_404(
             Review, id=self.kwargs['review_id'],
             title=self.kwargs['title_id']
         )
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author_id=self.request.user.id, review=review)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class SearchViewSet(ProfiledViewMixin, viewsets.GenericViewSet):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям."""
+    serializer_class = SearchResultSerializer
+    permission_classes = (permissions.AllowAny,)
+    pagination_class = PageNumberPagination
+
+    def get_kinds(self):
+        kinds = self.request.query_params.get('type')
+        if not kinds:
+            return tuple(search.MODELS)
+        kinds = tuple(kinds.split(','))
+        unknown = set(kinds) - set(search.MODELS)
+        if unknown:
+            raise ValidationError(
+                {'type': f'Неизвестный тип: {", ".join(sorted(unknown))}'}
+            )
+        return kinds
+
+    def get_results(self, hits):
+        """Загружает найденные объекты по одному запросу на тип."""
+        ids = {kind: [] for kind in search.MODELS}
+        for kind, pk, _ in hits:
+            ids[kind].append(pk)
+        found = {}
+        for row in Title.objects.filter(pk__in=ids['title']).values(
+            'id', 'name'
+        ):
+            found['title', row['id']] = {
+                'type': 'title', 'id': row['id'], 'title_id': row['id'],
+                'review_id': None, 'text': row['name'],
+            }
+        for row in Review.objects.filter(pk__in=ids['review']).values(
+            'id', 'title_id', 'text'
+        ):
+            found['review', row['id']] = {
+                'type': 'review', 'id': row['id'],
+                'title_id': row['title_id'], 'review_id': None,
+                'text': row['text'],
+            }
+        for row in Comment.objects.filter(pk__in=ids['comment']).values(
+            'id', 'review_id', 'review__title_id', 'text'
+        ):
+            found['comment', row['id']] = {
+                'type': 'comment', 'id': row['id'],
+                'title_id': row['review__title_id'],
+                'review_id': row['review_id'], 'text': row['text'],
+            }
+        return [
+            found[kind, pk] for kind, pk, _ in hits if (kind, pk) in found
+        ]
+
+    def list(self, request):
+        hits = search.search(
+            request.query_params.get('q', ''), kinds=self.get_kinds()
+        )
+        page = self.paginate_queryset(hits)
+        serializer = self.get_serializer(self.get_results(page), many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class UserViewSet(ProfiledViewMixin, SparseFieldsetsMixin,
+                  viewsets.ModelViewSet):
     """Работа с пользователями. Только для администратора."""
     queryset = User.objects.all()
     permission_classes = (
@@ -135,24 +414,25 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class SignUpViewSet(mixins.CreateModelMixin,
+class SignUpViewSet(ProfiledViewMixin,
+                    mixins.CreateModelMixin,
                     mixins.UpdateModelMixin,
                     viewsets.GenericViewSet):
     """Регистрация нового пользователя. Получение кода подтверждения."""
     queryset = User.objects.all()
     serializer_class = ConfirmationCodeSerializer
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (AuthRateThrottle,)
 
     def create(self, request, *args, **kwargs):
-        if User.objects.filter(
-            username=request.data.get('username'),
-            email=request.data.get('email')
-        ).exists():
+        serializer = self.get_serializer(data=request.data)
+        user = serializer.get_registered_user()
+        if user is not None:
+            serializer.send_code(user)
             return Response(
                 request.data,
                 status=status.HTTP_200_OK
             )
-        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
@@ -165,13 +445,42 @@ class SignUpViewSet(mixins.CreateModelMixin,
 
 @api_view(http_method_names=['POST', ])
 @permission_classes([permissions.AllowAny, ])
+@throttle_classes([AuthRateThrottle, ])
 def access_token(request):
     """Выдает токен доступа для авторизации."""
     serializer = AccessTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    data = serializer.validated_data
-    user = get_object_or_404(User, **data)
-    refresh = AccessToken.for_user(user)
-    return Response(
-        {'access': str(refresh.access_token)}, status=status.HTTP_201_CREATED
+    token = get_token_for_user(serializer.validated_data['user'])
+    return Response({'token': str(token)}, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['GET', ])
+@permission_classes([permissions.IsAuthenticated, IsAdminOrIsSuperuser, ])
+def metrics(request):
+    """Счётчики текущего процесса: кэш ответов и т.п."""
+    return Response(api_metrics.snapshot(), status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['POST', ])
+@permission_classes([permissions.AllowAny, ])
+def batch(request):
+    """
+    Выполняет пакет запросов к API. Права проверяются для каждого
+    запроса отдельно; с atomic запросы выполняются в одной транзакции.
+    """
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    responses, completed = api_batch.execute(
+        request,
+        serializer.validated_data['requests'],
+        atomic=serializer.validated_data['atomic']
     )
+    if not completed:
+        return Response(
+            {
+                'detail': 'Пакет отменён: запрос завершился ошибкой.',
+                'responses': responses,
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response({'responses': responses}, status=status.HTTP_200_OK)
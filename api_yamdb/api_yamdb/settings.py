@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -83,6 +84,107 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Кэш ответов справочников: категорий, жанров и произведений.
+# Ключи строятся по версиям данных из базы, поэтому и локальный кэш
+# каждого воркера не отдаёт устаревших ответов; общий бэкенд (Redis,
+# Memcached) лишь делит попадания между воркерами.
+API_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Профилирование запросов: заголовок Server-Timing и лог 'api.profiling'.
+# SAMPLE_RATE — доля профилируемых запросов, от 0 до 1.
+API_PROFILING = {
+    'SAMPLE_RATE': float(os.getenv('API_PROFILING_SAMPLE_RATE', 0)),
+    'LOG': os.getenv('API_PROFILING_LOG', '') == 'True',
+    'DUPLICATE_THRESHOLD': 3,
+}
+
+
+# Встраивание связей через ?expand=, см. api/expand.py. LIMITS — сколько
+# первых объектов связи встраивается в каждый родительский объект.
+API_EXPAND = {
+    'LIMITS': {
+        'reviews': 10,
+        'comments': 5,
+    },
+}
+
+
+# Рейтинговые таблицы /api/v1/titles/top/, см. reviews/leaderboards.py.
+# SIZE — длина таблицы, MIN_VOTES — вес средней оценки MEAN (None —
+# средняя по всем отзывам, обновляется командой rebuild_leaderboards).
+LEADERBOARDS = {
+    'SIZE': 100,
+    'MIN_VOTES': 10,
+    'MEAN': None,
+}
+
+# Похожие произведения /api/v1/titles/{id}/similar/, см.
+# reviews/recommendations.py. SIZE — число соседей произведения,
+# MIN_COMMON — минимум общих авторов отзывов у пары, CHUNK_SIZE —
+# произведений за шаг команды rebuild_similar_titles.
+RECOMMENDATIONS = {
+    'SIZE': 10,
+    'MIN_COMMON': 2,
+    'CHUNK_SIZE': 500,
+}
+
+# Популярные сейчас произведения /api/v1/titles/trending/, см.
+# reviews/trending.py. WINDOWS — окна и их время затухания в секундах,
+# WEIGHTS — вклад отзыва и комментария, MIN_SCORE — активность, ниже
+# которой произведение убирается из окна.
+TRENDING = {
+    'WINDOWS': {'1h': 3600, '24h': 86400, '7d': 604800},
+    'DEFAULT_WINDOW': '24h',
+    'WEIGHTS': {'review': 1.0, 'comment': 0.5},
+    'MIN_SCORE': 0.01,
+    'SIZE': 100,
+}
+
+# Пакетные запросы к /api/v1/batch/, см. api/batch.py.
+API_BATCH = {
+    'MAX_REQUESTS': 20,
+}
+
+
+# Ограничение частоты запросов, см. api/throttling.py. STORE:
+# api.throttling.LocalMemoryStore, api.throttling.CacheStore (OPTIONS:
+# alias) или api.throttling.SQLiteStore (OPTIONS: path).
+API_THROTTLING = {
+    'ENABLED': True,
+    'STORE': os.getenv(
+        'THROTTLING_STORE', 'api.throttling.LocalMemoryStore'
+    ),
+    'OPTIONS': {},
+    'RATES': {
+        'auth': '20/min',
+        'write': '60/min',
+    },
+}
+
+# Роль и права пользователя записываются в токен доступа, поэтому
+# аутентификация не читает пользователя из базы. Версия токенов
+# пользователя перечитывается из базы раз в LOCAL_TIMEOUT секунд, так
+# что смена роли отзывает токены во всех воркерах не позже этого срока.
+API_STATELESS_JWT = {
+    'ENABLED': True,
+    'LOCAL_TIMEOUT': 5,
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -124,7 +226,9 @@ AUTH_USER_MODEL = 'users.User'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
-EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_FILE_PATH = os.getenv(
+    'EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'sent_emails')
+)
 
 REST_FRAMEWORK = {
 
@@ -133,11 +237,15 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.'
                                 'PageNumberPagination',
     "PAGE_SIZE": 10,
+    # Число прокси перед приложением. Без прокси ограничение частоты
+    # запросов берёт IP из REMOTE_ADDR и не доверяет X-Forwarded-For,
+    # который клиент может подставить сам.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
 SIMPLE_JWT = {
@@ -145,10 +253,36 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Для отладки без почтового сервера подойдут
+# django.core.mail.backends.filebased.EmailBackend (письма в
+# EMAIL_FILE_PATH) и django.core.mail.backends.locmem.EmailBackend.
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend'
+)
+
+# Очередь исходящих писем, см. api/outbox.py. MODE: 'thread' — фоновый
+# поток процесса, 'command' — только manage.py drain_outbox, 'sync' —
+# отправка сразу после коммита. RETRY_DELAY удваивается с каждой
+# неудачной попыткой, RATE_LIMIT — писем в секунду (0 — без ограничения).
+MAIL_OUTBOX = {
+    'MODE': os.getenv('MAIL_OUTBOX_MODE', 'thread'),
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'LEASE': 300,
+    'POLL_INTERVAL': 60,
+    'RATE_LIMIT': float(os.getenv('MAIL_RATE_LIMIT', 0)),
+}
 
 CHAR_COUNT = 15
 
+# Коды подтверждения хранятся хешами и действуют TTL секунд; после
+# MAX_ATTEMPTS неверных попыток нужно запросить новый код.
+CONFIRMATION_CODES = {
+    'TTL': 3600,
+    'MAX_ATTEMPTS': 5,
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=3),
     'ROTATE_REFRESH_TOKENS': False,
@@ -0,0 +1,143 @@
+"""
+Рейтинговые таблицы произведений: общая, по категориям и по жанрам.
+
+Произведения ранжируются байесовским рейтингом
+    (rating_sum + m * C) / (rating_count + m),
+где m — MIN_VOTES, а C — средняя оценка по всем отзывам: пока оценок
+мало, рейтинг тянется к среднему, и одна десятка не выводит
+произведение на первое место.
+
+У каждого произведения есть строка TitleRank в каждой его таблице.
+Отзыв обновляет строки своего произведения одним UPDATE, а индекс
+(board, score, title) отдаёт первые K мест таблицы за O(K). C меняется
+с каждым отзывом, но пересчитывать из-за этого все строки дорого, поэтому
+он хранится в базе (LeaderboardMean), одинаковый для всех воркеров, и
+обновляется командой rebuild_leaderboards.
+"""
+from django.conf import settings
+from django.db.models import (Case, F, FloatField, OuterRef, Subquery, Sum,
+                              Value, When)
+from django.db.models.functions import Cast
+
+from .models import GenreToTitle, LeaderboardMean, Title, TitleRank
+
+DEFAULTS = {
+    'SIZE': 100,
+    'MIN_VOTES': 10,
+    'MEAN': None,
+}
+# Единственная строка LeaderboardMean.
+MEAN_PK = 1
+# Середина шкалы оценок, пока отзывов нет совсем.
+DEFAULT_MEAN = 5.5
+
+
+def get_setting(name):
+    return getattr(settings, 'LEADERBOARDS', {}).get(name, DEFAULTS[name])
+
+
+def get_board(category_id=None, genre_id=None):
+    if category_id is not None:
+        return f'category:{category_id}'
+    if genre_id is not None:
+        return f'genre:{genre_id}'
+    return 'all'
+
+
+def calculate_mean():
+    totals = Title.objects.aggregate(
+        rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count')
+    )
+    if totals['rating_count']:
+        return totals['rating_sum'] / totals['rating_count']
+    return DEFAULT_MEAN
+
+
+def get_mean(refresh=False):
+    """
+    Средняя оценка C: из настройки MEAN или сохранённая в базе. С
+    refresh пересчитывается по всем отзывам и сохраняется.
+    """
+    mean = get_setting('MEAN')
+    if mean is not None:
+        return mean
+    means = LeaderboardMean.objects.filter(pk=MEAN_PK)
+    if refresh:
+        mean = calculate_mean()
+        LeaderboardMean.objects.update_or_create(
+            pk=MEAN_PK, defaults={'mean': mean}
+        )
+        return mean
+    mean = means.values_list('mean', flat=True).first()
+    if mean is None:
+        # Первым сохраняется значение одного из воркеров, остальные
+        # перечитывают его.
+        LeaderboardMean.objects.bulk_create(
+            [LeaderboardMean(pk=MEAN_PK, mean=calculate_mean())],
+            ignore_conflicts=True
+        )
+        mean = means.values_list('mean', flat=True).get()
+    return mean
+
+
+def get_score(mean=None):
+    """Выражение взвешенного рейтинга для queryset произведений."""
+    votes = get_setting('MIN_VOTES')
+    mean = get_mean() if mean is None else mean
+    return Case(
+        When(rating_count=0, then=Value(None)),
+        default=(
+            (Cast('rating_sum', FloatField()) + votes * mean)
+            / (F('rating_count') + votes)
+        ),
+        output_field=FloatField()
+    )
+
+
+def update_scores(title_ids, mean=None):
+    """Пересчитывает места произведений во всех их таблицах."""
+    scores = Title.objects.filter(pk=OuterRef('title_id')).annotate(
+        score=get_score(mean)
+    ).values('score')
+    TitleRank.objects.filter(title_id__in=title_ids).update(
+        score=Subquery(scores)
+    )
+
+
+def sync_boards(title_ids, mean=None):
+    """Приводит таблицы произведений к их текущим категории и жанрам."""
+    expected = {}
+    titles = Title.objects.filter(pk__in=title_ids).annotate(
+        score=get_score(mean)
+    ).values_list('id', 'category_id', 'score')
+    scores = {}
+    for title_id, category_id, score in titles:
+        scores[title_id] = score
+        expected[title_id, get_board()] = score
+        if category_id is not None:
+            expected[title_id, get_board(category_id=category_id)] = score
+    for title_id, genre_id in GenreToTitle.objects.filter(
+        title_id__in=scores
+    ).values_list('title_id', 'genre_id'):
+        expected[title_id, get_board(genre_id=genre_id)] = scores[title_id]
+    stale = []
+    for pk, title_id, board in TitleRank.objects.filter(
+        title_id__in=title_ids
+    ).values_list('id', 'title_id', 'board'):
+        if (title_id, board) in expected:
+            del expected[title_id, board]
+        else:
+            stale.append(pk)
+    if stale:
+        TitleRank.objects.filter(pk__in=stale).delete()
+    TitleRank.objects.bulk_create([
+        TitleRank(title_id=title_id, board=board, score=score)
+        for (title_id, board), score in expected.items()
+    ])
+
+
+def get_top(board, limit=None):
+    """Первые limit мест таблицы, без произведений без оценок."""
+    return TitleRank.objects.filter(
+        board=board, score__isnull=False
+    ).order_by('-score', '-title_id')[:limit or get_setting('SIZE')]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:08
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def fill_title_rating(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    stats = Review.objects.values('title').annotate(
+        rating_sum=Sum('score'),
+        rating_count=Count('id'),
+        rating=Avg('score')
+    )
+    for row in stats:
+        Title.objects.filter(pk=row.pop('title')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20230205_1755'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_title_rating, migrations.RunPython.noop),
+    ]
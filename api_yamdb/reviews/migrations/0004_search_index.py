@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import migrations
+
+# DDL и заполнение индекса на момент миграции, см. reviews/search.py:
+# миграция не должна зависеть от текущего кода модуля поиска.
+TABLE = 'reviews_search'
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'simple')
+
+# rowid FTS5 = id * 3 + код типа: title — 1, review — 2, comment — 3.
+SQLITE_SQL = (
+    f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+    'kind UNINDEXED, object_id UNINDEXED, body)',
+    f'INSERT INTO {TABLE} (rowid, kind, object_id, body) '
+    "SELECT id * 3 + 1, 'title', id, name || char(10) || description "
+    'FROM reviews_title',
+    f'INSERT INTO {TABLE} (rowid, kind, object_id, body) '
+    "SELECT id * 3 + 2, 'review', id, text FROM reviews_review",
+    f'INSERT INTO {TABLE} (rowid, kind, object_id, body) '
+    "SELECT id * 3 + 3, 'comment', id, text FROM reviews_comment",
+)
+POSTGRESQL_SQL = (
+    f'CREATE TABLE {TABLE} ('
+    'kind varchar(16) NOT NULL, object_id integer NOT NULL, '
+    'body tsvector NOT NULL, PRIMARY KEY (kind, object_id))',
+    f'CREATE INDEX {TABLE}_body ON {TABLE} USING gin (body)',
+    f'INSERT INTO {TABLE} (kind, object_id, body) '
+    f"SELECT 'title', id, to_tsvector('{SEARCH_CONFIG}', "
+    "name || E'\\n' || description) FROM reviews_title",
+    f'INSERT INTO {TABLE} (kind, object_id, body) '
+    f"SELECT 'review', id, to_tsvector('{SEARCH_CONFIG}', text) "
+    'FROM reviews_review',
+    f'INSERT INTO {TABLE} (kind, object_id, body) '
+    f"SELECT 'comment', id, to_tsvector('{SEARCH_CONFIG}', text) "
+    'FROM reviews_comment',
+)
+
+
+def create_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_SQL, 'postgresql': POSTGRESQL_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
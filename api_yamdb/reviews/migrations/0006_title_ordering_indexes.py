@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'year'], name='title_category_year'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='title_rating'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_count', 'id'], name='title_reviews_count'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_title_ranks(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreToTitle = apps.get_model('reviews', 'GenreToTitle')
+    TitleRank = apps.get_model('reviews', 'TitleRank')
+    leaderboards = getattr(settings, 'LEADERBOARDS', {})
+    votes = leaderboards.get('MIN_VOTES', 10)
+    titles = list(Title.objects.values_list(
+        'id', 'category_id', 'rating_sum', 'rating_count'
+    ))
+    mean = leaderboards.get('MEAN')
+    if mean is None:
+        total = sum(row[3] for row in titles)
+        mean = sum(row[2] for row in titles) / total if total else 5.5
+    scores = {}
+    ranks = []
+    for title_id, category_id, rating_sum, rating_count in titles:
+        score = None
+        if rating_count:
+            score = (rating_sum + votes * mean) / (rating_count + votes)
+        scores[title_id] = score
+        ranks.append(TitleRank(title_id=title_id, board='all', score=score))
+        if category_id is not None:
+            ranks.append(TitleRank(
+                title_id=title_id, board=f'category:{category_id}',
+                score=score
+            ))
+    for title_id, genre_id in GenreToTitle.objects.values_list(
+        'title_id', 'genre_id'
+    ).distinct():
+        ranks.append(TitleRank(
+            title_id=title_id, board=f'genre:{genre_id}',
+            score=scores[title_id]
+        ))
+    TitleRank.objects.bulk_create(ranks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRank',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=32, verbose_name='Рейтинговая таблица')),
+                ('score', models.FloatField(blank=True, null=True, verbose_name='Взвешенный рейтинг')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['board', 'score', 'title'], name='titlerank_board_score'),
+        ),
+        migrations.AddConstraint(
+            model_name='titlerank',
+            constraint=models.UniqueConstraint(fields=('title', 'board'), name='unique_title_rank'),
+        ),
+        migrations.RunPython(fill_title_ranks, migrations.RunPython.noop),
+    ]
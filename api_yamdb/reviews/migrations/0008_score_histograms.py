@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:49
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_score_histograms(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    ScoreHistogram = apps.get_model('reviews', 'ScoreHistogram')
+    histograms = {
+        pk: ScoreHistogram(title_id=pk)
+        for pk in Title.objects.values_list('id', flat=True)
+    }
+    for row in Review.objects.values('title_id', 'score').annotate(
+        count=Count('id')
+    ).order_by():
+        setattr(
+            histograms[row['title_id']], f'score_{row["score"]}',
+            row['count']
+        )
+    ScoreHistogram.objects.bulk_create(histograms.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_ranks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreHistogram',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score_histogram', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Оценок 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Оценок 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Оценок 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Оценок 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Оценок 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Оценок 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Оценок 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Оценок 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Оценок 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Оценок 10')),
+            ],
+            options={
+                'verbose_name': 'Распределение оценок',
+                'verbose_name_plural': 'Распределения оценок',
+            },
+        ),
+        migrations.RunPython(fill_score_histograms, migrations.RunPython.noop),
+    ]
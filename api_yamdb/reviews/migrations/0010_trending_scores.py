@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_similar_titles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=8, verbose_name='Окно')),
+                ('score', models.FloatField(verbose_name='Активность')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_scores', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Активность произведения',
+                'verbose_name_plural': 'Активность произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['window', 'score', 'title'], name='trendingscore_window_score'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingscore',
+            constraint=models.UniqueConstraint(fields=('title', 'window'), name='unique_trending_score'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_trending_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Данные')),
+                ('stamp', models.BigIntegerField(help_text='Время последнего изменения в микросекундах.', verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версии данных',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_data_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardMean',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField(verbose_name='Средняя оценка')),
+            ],
+            options={
+                'verbose_name': 'Средняя оценка рейтингов',
+                'verbose_name_plural': 'Средние оценки рейтингов',
+            },
+        ),
+    ]
@@ -4,6 +4,9 @@ from users.models import User
 
 from .validators import validate_year
 
+# Оценки отзывов; у ScoreHistogram на каждую есть поле score_<оценка>.
+SCORES = range(1, 11)
+
 
 class Genre(models.Model):
     """Модель жанров произведений."""
@@ -72,10 +75,36 @@ class Title(models.Model):
         Genre,
         through='GenreToTitle',
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Рейтинг'
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        # Сортировки списка произведений с доворотом по id и фильтр по
+        # категории с диапазоном лет.
+        indexes = (
+            models.Index(
+                fields=('category', 'year'), name='title_category_year'
+            ),
+            models.Index(fields=('rating', 'id'), name='title_rating'),
+            models.Index(fields=('year', 'id'), name='title_year'),
+            models.Index(
+                fields=('rating_count', 'id'), name='title_reviews_count'
+            ),
+            models.Index(fields=('name', 'id'), name='title_name'),
+        )
 
     def __str__(self):
         return self.name
@@ -94,6 +123,224 @@ class GenreToTitle(models.Model):
         return f'{self.title}, {self.genre}'
 
 
+class TitleRank(models.Model):
+    """
+    Место произведения в рейтинговых таблицах: общей ('all'), своей
+    категории ('category:<id>') и каждого своего жанра ('genre:<id>').
+    """
+    board = models.CharField(
+        max_length=32,
+        verbose_name='Рейтинговая таблица'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='ranks',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Взвешенный рейтинг'
+    )
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        indexes = (
+            models.Index(
+                fields=('board', 'score', 'title'),
+                name='titlerank_board_score'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'board'),
+                name='unique_title_rank'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.board}: {self.title_id}'
+
+
+class LeaderboardMean(models.Model):
+    """
+    Средняя оценка C рейтинговых таблиц, общая для всех воркеров,
+    см. reviews/leaderboards.py. В таблице одна строка.
+    """
+    mean = models.FloatField(
+        verbose_name='Средняя оценка'
+    )
+
+    class Meta:
+        verbose_name = 'Средняя оценка рейтингов'
+        verbose_name_plural = 'Средние оценки рейтингов'
+
+    def __str__(self):
+        return f'{self.mean:.2f}'
+
+
+class SimilarTitle(models.Model):
+    """
+    Произведение, похожее на title по оценкам общих авторов отзывов,
+    см. reviews/recommendations.py.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        # Запросы по title обслуживает индекс similartitle_title_score.
+        db_index=False,
+        related_name='similar_titles',
+        verbose_name='Произведение'
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожее произведение'
+    )
+    score = models.FloatField(
+        verbose_name='Сходство'
+    )
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        indexes = (
+            models.Index(
+                fields=('title', 'score', 'similar'),
+                name='similartitle_title_score'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.title_id} ~ {self.similar_id}: {self.score:.3f}'
+
+
+class TrendingScore(models.Model):
+    """
+    Активность произведения в окне window с экспоненциальным затуханием
+    (логарифм, отнесённый к эпохе), см. reviews/trending.py.
+    """
+    window = models.CharField(
+        max_length=8,
+        verbose_name='Окно'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='trending_scores',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField(
+        verbose_name='Активность'
+    )
+
+    class Meta:
+        verbose_name = 'Активность произведения'
+        verbose_name_plural = 'Активность произведений'
+        indexes = (
+            models.Index(
+                fields=('window', 'score', 'title'),
+                name='trendingscore_window_score'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'window'),
+                name='unique_trending_score'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.window}: {self.title_id}'
+
+
+class ScoreHistogram(models.Model):
+    """
+    Количество оценок 1–10 произведения: поля score_1 … score_10.
+    Отзывы сдвигают счётчики UPDATE'ом, см. reviews/stats.py.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_histogram',
+        verbose_name='Произведение'
+    )
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 1'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 2'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 3'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 4'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 5'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 6'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 7'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 8'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 9'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок 10'
+    )
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return f'Оценки произведения {self.title_id}'
+
+    def get_counts(self):
+        return [getattr(self, f'score_{score}') for score in SCORES]
+
+
+class DataVersion(models.Model):
+    """Версия данных для ETag и кэша ответов, см. api/cache.py."""
+    name = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Данные'
+    )
+    stamp = models.BigIntegerField(
+        verbose_name='Время изменения',
+        help_text='Время последнего изменения в микросекундах.'
+    )
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.name}: {self.stamp}'
+
+
 class Review(models.Model):
     """Модель для работы с отзывами"""
     author = models.ForeignKey(
@@ -128,6 +375,12 @@ class Review(models.Model):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ('pub_date',)
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date'
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=('title', 'author'),
@@ -138,6 +391,17 @@ class Review(models.Model):
     def __str__(self):
         return f'Оценка {self.author.username} на {self.title.name}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        """Запоминает оценку и произведение, учтённые в рейтинге."""
+        self._rated_score = self.__dict__.get('score')
+        self._rated_title_id = self.__dict__.get('title_id')
+
 
 class Comment(models.Model):
     """Модель для работы с комментариями"""
@@ -166,6 +430,12 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('pub_date',)
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date'
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий {self.author.username}\
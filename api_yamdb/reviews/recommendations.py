@@ -0,0 +1,107 @@
+"""
+Похожие произведения: «кто оценил это, оценил и …».
+
+Отзывы образуют разреженную матрицу R пользователь × произведение, в
+ячейке которой — оценка, сдвинутая к середине шкалы: 2 * score - 11.
+Так оценки 1–5 отрицательны, 6–10 положительны и ни одна не равна нулю,
+а «понравилось одно, не понравилось другое» уменьшает сходство.
+Сходство произведений a и b — косинус их столбцов:
+    sim(a, b) = Σ R[u, a] * R[u, b] / (|R[:, a]| * |R[:, b]|).
+
+Числители для всех пар — произведение Rᵀ·R. Его строки для части
+произведений считает база: соединяет отзывы с отзывами тех же авторов и
+группирует по паре произведений, поэтому матрица целиком не строится
+ни в базе, ни в памяти. Команда rebuild_similar_titles идёт по
+произведениям частями по CHUNK_SIZE; в памяти остаются только длины
+столбцов и SIZE лучших соседей каждого произведения части, а в таблицу
+SimilarTitle попадают только они.
+"""
+import heapq
+import math
+
+from django.conf import settings
+from django.db.models import Count, F, Sum
+
+from .models import Review, SimilarTitle
+
+DEFAULTS = {
+    'SIZE': 10,
+    'MIN_COMMON': 2,
+    'CHUNK_SIZE': 500,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'RECOMMENDATIONS', {}).get(name, DEFAULTS[name])
+
+
+def centered(field):
+    return F(field) * 2 - 11
+
+
+def get_norms():
+    """{произведение: длина его столбца в R}."""
+    return {
+        title_id: math.sqrt(total)
+        for title_id, total in Review.objects.values('title_id').annotate(
+            total=Sum(centered('score') * centered('score'))
+        ).values_list('title_id', 'total').order_by().iterator()
+    }
+
+
+def get_products(title_ids):
+    """
+    Строки Rᵀ·R для title_ids: (a, b, Σ R[u, a] * R[u, b], число общих
+    авторов) для каждой пары произведений с общими авторами.
+    """
+    return Review.objects.filter(title_id__in=title_ids).values(
+        'title_id', 'author__reviews__title_id'
+    ).annotate(
+        product=Sum(
+            centered('score') * centered('author__reviews__score')
+        ),
+        common=Count('id')
+    ).values_list(
+        'title_id', 'author__reviews__title_id', 'product', 'common'
+    ).order_by().iterator()
+
+
+def find_similar(title_ids, norms, size=None, min_common=None):
+    """{произведение: [(сходство, сосед), …]} по убыванию сходства."""
+    size = size or get_setting('SIZE')
+    if min_common is None:
+        min_common = get_setting('MIN_COMMON')
+    neighbours = {title_id: [] for title_id in title_ids}
+    for title_id, other_id, product, common in get_products(title_ids):
+        if other_id == title_id or common < min_common or product <= 0:
+            continue
+        if not norms.get(title_id) or not norms.get(other_id):
+            # Отзыв появился после подсчёта длин: учтём при пересчёте.
+            continue
+        item = (product / (norms[title_id] * norms[other_id]), other_id)
+        heap = neighbours[title_id]
+        if len(heap) < size:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    return {
+        title_id: sorted(heap, reverse=True)
+        for title_id, heap in neighbours.items()
+    }
+
+
+def store_similar(neighbours):
+    """Заменяет соседей произведений из neighbours."""
+    SimilarTitle.objects.filter(title_id__in=neighbours).delete()
+    SimilarTitle.objects.bulk_create([
+        SimilarTitle(title_id=title_id, similar_id=similar_id, score=score)
+        for title_id, items in neighbours.items()
+        for score, similar_id in items
+    ])
+
+
+def get_similar(title_id, limit=None):
+    """Первые limit соседей произведения по убыванию сходства."""
+    return SimilarTitle.objects.filter(title_id=title_id).order_by(
+        '-score', '-similar_id'
+    )[:limit or get_setting('SIZE')]
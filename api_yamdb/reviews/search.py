@@ -0,0 +1,220 @@
+"""
+Полнотекстовый индекс произведений, отзывов и комментариев.
+
+На SQLite индекс хранится в виртуальной таблице FTS5, на PostgreSQL —
+в обычной таблице с колонкой tsvector и GIN-индексом. Для остальных
+движков поиск сводится к icontains.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Comment, Review, Title
+
+TABLE = 'reviews_search'
+SEARCH_LIMIT = getattr(settings, 'SEARCH_LIMIT', 1000)
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'simple')
+
+MODELS = {
+    'title': Title,
+    'review': Review,
+    'comment': Comment,
+}
+# В FTS5 искать по UNINDEXED-колонкам можно только перебором, поэтому
+# тип и id объекта упакованы в rowid: удаление и замена идут по ключу.
+KIND_CODES = {'title': 1, 'review': 2, 'comment': 3}
+
+
+def get_rowid(kind, pk):
+    return pk * len(KIND_CODES) + KIND_CODES[kind]
+
+
+def create_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+            'kind UNINDEXED, object_id UNINDEXED, body)'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE TABLE {TABLE} ('
+            'kind varchar(16) NOT NULL, object_id integer NOT NULL, '
+            'body tsvector NOT NULL, PRIMARY KEY (kind, object_id))'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {TABLE}_body ON {TABLE} USING gin (body)'
+        )
+
+
+def drop_index(schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def is_supported():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def get_body(kind, obj):
+    if kind == 'title':
+        return f'{obj.name}\n{obj.description}'
+    return obj.text
+
+
+def index_objects(kind, objects):
+    """Добавляет или обновляет записи индекса для объектов одного типа."""
+    if not is_supported():
+        return
+    rows = [(kind, obj.pk, get_body(kind, obj)) for obj in objects]
+    if not rows:
+        return
+    remove_objects(kind, [row[1] for row in rows])
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, kind, object_id, body) '
+                'VALUES (%s, %s, %s, %s)',
+                [(get_rowid(kind, pk), kind, pk, body)
+                 for kind, pk, body in rows]
+            )
+        else:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (kind, object_id, body) '
+                f'VALUES (%s, %s, to_tsvector(\'{SEARCH_CONFIG}\', %s))',
+                rows
+            )
+
+
+def remove_objects(kind, pks):
+    if not is_supported() or not pks:
+        return
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})',
+                [get_rowid(kind, pk) for pk in pks]
+            )
+        else:
+            cursor.execute(
+                f'DELETE FROM {TABLE} '
+                f'WHERE kind = %s AND object_id IN ({placeholders})',
+                [kind, *pks]
+            )
+
+
+def clear_index():
+    if is_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+
+def build_query(text):
+    """
+    Превращает пользовательский ввод в запрос к индексу: все слова
+    должны встретиться, каждое как префикс.
+    """
+    words = re.findall(r'\w+', text.lower())
+    if connection.vendor == 'sqlite':
+        return ' '.join(f'"{word}"*' for word in words)
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def search(text, kinds=None, limit=SEARCH_LIMIT):
+    """
+    Возвращает список (тип, id, ранг), лучшие совпадения первыми.
+    Чем меньше ранг, тем выше совпадение.
+    """
+    kinds = list(kinds or MODELS)
+    query = build_query(text)
+    if not query:
+        return []
+    if not is_supported():
+        return fallback_search(text, kinds, limit)
+    placeholders = ', '.join(['%s'] * len(kinds))
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT kind, object_id, rank FROM {TABLE} '
+            f'WHERE {TABLE} MATCH %s AND kind IN ({placeholders}) '
+            'ORDER BY rank LIMIT %s'
+        )
+        params = [f'body : ({query})', *kinds, limit]
+    else:
+        sql = (
+            f'SELECT kind, object_id, -ts_rank(body, q) AS rank '
+            f'FROM {TABLE}, to_tsquery(\'{SEARCH_CONFIG}\', %s) q '
+            f'WHERE body @@ q AND kind IN ({placeholders}) '
+            'ORDER BY rank LIMIT %s'
+        )
+        params = [query, *kinds, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            (kind, int(pk), rank) for kind, pk, rank in cursor.fetchall()
+        ]
+
+
+def filter_ranked(queryset, kind, text):
+    """
+    Оставляет в queryset объекты kind, найденные по text, лучшие
+    совпадения первыми. Индекс присоединяется к таблице модели в том же
+    запросе, поэтому число параметров не зависит от числа совпадений, а
+    страницу отрезает LIMIT пагинации.
+    """
+    query = build_query(text)
+    if not query:
+        return queryset.none()
+    if not is_supported():
+        field = 'name' if kind == 'title' else 'text'
+        return queryset.filter(**{f'{field}__icontains': text})
+    model_table = queryset.model._meta.db_table
+    where = [
+        f'{TABLE}.kind = %s', f'{TABLE}.object_id = {model_table}.id'
+    ]
+    if connection.vendor == 'sqlite':
+        where.insert(0, f'{TABLE} MATCH %s')
+        rank, rank_params = f'{TABLE}.rank', []
+        params = [f'body : ({query})', kind]
+    else:
+        tsquery = f'to_tsquery(\'{SEARCH_CONFIG}\', %s)'
+        where.insert(0, f'{TABLE}.body @@ {tsquery}')
+        rank, rank_params = f'-ts_rank({TABLE}.body, {tsquery})', [query]
+        params = [query, kind]
+    return queryset.extra(
+        select={'search_rank': rank}, select_params=rank_params,
+        tables=[TABLE], where=where, params=params,
+        order_by=('search_rank', 'id')
+    )
+
+
+def fallback_search(text, kinds, limit):
+    hits = []
+    for kind in kinds:
+        field = 'name' if kind == 'title' else 'text'
+        pks = MODELS[kind].objects.filter(
+            **{f'{field}__icontains': text}
+        ).values_list('pk', flat=True)[:limit]
+        hits.extend((kind, pk, 0) for pk in pks)
+    return hits[:limit]
+
+
+def rebuild_index(batch_size=1000, models=None):
+    """Переиндексирует все объекты, возвращает {тип: количество}."""
+    clear_index()
+    counts = {}
+    for kind, model in (models or MODELS).items():
+        fields = ('id', 'name', 'description') if kind == 'title' else (
+            'id', 'text'
+        )
+        batch, counts[kind] = [], 0
+        for obj in model.objects.only(*fields).order_by().iterator():
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index_objects(kind, batch)
+                counts[kind] += len(batch)
+                batch = []
+        index_objects(kind, batch)
+        counts[kind] += len(batch)
+    return counts
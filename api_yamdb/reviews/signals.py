@@ -0,0 +1,132 @@
+from django.db.models import (Avg, Case, Count, F, FloatField, Sum, Value,
+                              When)
+from django.db.models.functions import Cast
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import leaderboards, search, stats, trending
+from .models import (Category, Comment, GenreToTitle, Review, ScoreHistogram,
+                     Title, TitleRank)
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """
+    Сдвигает сумму и количество оценок произведения и пересчитывает
+    средний рейтинг одним UPDATE без чтения отзывов.
+    """
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=Case(
+            When(rating_count=-count_delta, then=Value(None)),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField()
+        )
+    )
+
+
+def recalculate_title_rating(title_id):
+    """Пересчитывает рейтинг произведения по его отзывам."""
+    stats = Review.objects.filter(title_id=title_id).aggregate(
+        rating_sum=Sum('score'),
+        rating_count=Count('id'),
+        rating=Avg('score')
+    )
+    stats['rating_sum'] = stats['rating_sum'] or 0
+    Title.objects.filter(pk=title_id).update(**stats)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_score = getattr(instance, '_rated_score', None)
+    old_title_id = getattr(instance, '_rated_title_id', None)
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+        stats.update_histogram(instance.title_id, added=instance.score)
+    elif old_score is None:
+        recalculate_title_rating(instance.title_id)
+        stats.recalculate_histograms([instance.title_id])
+    elif old_title_id != instance.title_id:
+        update_title_rating(old_title_id, -old_score, -1)
+        update_title_rating(instance.title_id, instance.score, 1)
+        stats.update_histogram(old_title_id, removed=old_score)
+        stats.update_histogram(instance.title_id, added=instance.score)
+    elif old_score != instance.score:
+        update_title_rating(instance.title_id, instance.score - old_score, 0)
+        stats.update_histogram(
+            instance.title_id, added=instance.score, removed=old_score
+        )
+    if created or (old_score, old_title_id) != (
+        instance.score, instance.title_id
+    ):
+        leaderboards.update_scores(
+            {instance.title_id, old_title_id} - {None}
+        )
+    instance.remember_rating_state()
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, -instance.score, -1)
+    stats.update_histogram(instance.title_id, removed=instance.score)
+    leaderboards.update_scores([instance.title_id])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def record_activity(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    title_id = getattr(instance, 'title_id', None)
+    if title_id is None:
+        title_id = instance.review.title_id
+    trending.record(title_id, sender._meta.model_name, instance.pub_date)
+
+
+@receiver(post_save, sender=Title)
+def title_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ScoreHistogram.objects.create(title=instance)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=GenreToTitle)
+@receiver(post_delete, sender=GenreToTitle)
+def title_boards_changed(sender, instance, raw=False, **kwargs):
+    """Категория или жанр произведения могли смениться."""
+    if not raw:
+        leaderboards.sync_boards([getattr(instance, 'title_id', instance.pk)])
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # Произведениям категория обнуляется UPDATE'ом, без сигналов.
+    TitleRank.objects.filter(
+        board=leaderboards.get_board(category_id=instance.pk)
+    ).delete()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action.startswith('post_'):
+        leaderboards.sync_boards((pk_set or ()) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_objects(sender._meta.model_name, [instance])
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_objects(sender._meta.model_name, [instance.pk])
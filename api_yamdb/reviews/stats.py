@@ -0,0 +1,92 @@
+"""
+Распределение оценок произведения и статистика по нему.
+
+Счётчики каждой оценки хранятся в ScoreHistogram и сдвигаются при
+записи отзыва, поэтому количество, среднее, медиана и отклонение
+считаются по десяти числам, без чтения отзывов.
+"""
+import math
+
+from django.db.models import Count, F
+
+from .models import SCORES, Review, ScoreHistogram
+
+
+def get_field(score):
+    return f'score_{score}'
+
+
+def update_histogram(title_id, added=None, removed=None):
+    """Сдвигает счётчики оценок произведения одним UPDATE."""
+    if added == removed:
+        return
+    changes = {}
+    if added is not None:
+        changes[get_field(added)] = F(get_field(added)) + 1
+    if removed is not None:
+        changes[get_field(removed)] = F(get_field(removed)) - 1
+    updated = ScoreHistogram.objects.filter(title_id=title_id).update(
+        **changes
+    )
+    if not updated and added is not None:
+        # Счётчиков ещё нет, например у загруженного из CSV произведения.
+        # Без добавленной оценки их нет и при удалении произведения:
+        # тогда создавать их заново нельзя.
+        recalculate_histograms([title_id])
+
+
+def count_scores(title_ids=None):
+    """{произведение: [количество оценок 1, …, 10]} по отзывам."""
+    reviews = Review.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+    counts = {}
+    for row in reviews.values('title_id', 'score').annotate(
+        count=Count('id')
+    ).order_by():
+        title_counts = counts.setdefault(row['title_id'], [0] * len(SCORES))
+        title_counts[row['score'] - SCORES[0]] = row['count']
+    return counts
+
+
+def recalculate_histograms(title_ids):
+    """Пересчитывает счётчики произведений по их отзывам."""
+    counts = count_scores(title_ids)
+    for title_id in title_ids:
+        ScoreHistogram.objects.update_or_create(
+            title_id=title_id,
+            defaults=dict(zip(
+                map(get_field, SCORES),
+                counts.get(title_id, [0] * len(SCORES))
+            ))
+        )
+
+
+def describe(counts):
+    """Количество, среднее, медиана и отклонение оценок по счётчикам."""
+    total = sum(counts)
+    stats = {
+        'count': total,
+        'mean': None,
+        'median': None,
+        'stddev': None,
+        'histogram': list(counts),
+    }
+    if not total:
+        return stats
+    mean = sum(score * count for score, count in zip(SCORES, counts)) / total
+    stats['mean'] = mean
+    stats['stddev'] = math.sqrt(sum(
+        count * (score - mean) ** 2 for score, count in zip(SCORES, counts)
+    ) / total)
+    # Медиана — среднее оценок на местах (total - 1) // 2 и total // 2.
+    middle = []
+    seen = 0
+    for score, count in zip(SCORES, counts):
+        middle += [
+            score for position in ((total - 1) // 2, total // 2)
+            if seen <= position < seen + count
+        ]
+        seen += count
+    stats['median'] = sum(middle) / len(middle)
+    return stats
@@ -0,0 +1,151 @@
+"""
+Популярные сейчас произведения: активность по отзывам и комментариям
+с экспоненциальным затуханием.
+
+Активность произведения в окне τ (WINDOWS) в момент t:
+    A(t) = Σ w_i * exp(-(t - t_i) / τ),
+где w_i — вес события (WEIGHTS), t_i — его время. Множитель
+exp(-t / τ) у всех произведений общий, поэтому в TrendingScore хранится
+логарифм активности, отнесённой к фиксированной эпохе:
+    score = ln Σ w_i * exp((t_i - EPOCH) / τ) = ln A(t) + (t - EPOCH) / τ.
+Со временем score не меняется, а порядок по нему совпадает с порядком по
+A(t), поэтому первые K мест — это диапазон индекса (window, score, title).
+Событие добавляется к score одним UPDATE сложением в логарифмах:
+    ln(e^a + e^b) = max(a, b) + ln(1 + e^-|a - b|),
+без переполнения, сколько бы времени ни прошло с эпохи.
+
+Удалённые отзывы и комментарии из активности не вычитаются. Команда
+compact_trending пересчитывает окна по событиям, вклад которых ещё не
+меньше MIN_SCORE, и удаляет строки затухших произведений.
+"""
+import datetime as dt
+import math
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from .models import Comment, Review, TrendingScore
+
+DEFAULTS = {
+    'WINDOWS': {'1h': 3600, '24h': 86400, '7d': 604800},
+    'DEFAULT_WINDOW': '24h',
+    'WEIGHTS': {'review': 1.0, 'comment': 0.5},
+    'MIN_SCORE': 0.01,
+    'SIZE': 100,
+}
+EPOCH = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def get_setting(name):
+    return getattr(settings, 'TRENDING', {}).get(name, DEFAULTS[name])
+
+
+def get_offset(window, moment):
+    """(moment - EPOCH) / τ: на столько затухла активность с эпохи."""
+    seconds = (moment - EPOCH).total_seconds()
+    return seconds / get_setting('WINDOWS')[window]
+
+
+def get_threshold(window, moment):
+    """Наименьший score, активность которого не меньше MIN_SCORE."""
+    return math.log(get_setting('MIN_SCORE')) + get_offset(window, moment)
+
+
+def get_activity(score, window, moment):
+    return math.exp(score - get_offset(window, moment))
+
+
+def log_add(left, right):
+    """ln(e^left + e^right) без переполнения."""
+    if left is None:
+        return right
+    return max(left, right) + math.log1p(math.exp(-abs(left - right)))
+
+
+def record(title_id, kind, moment=None):
+    """Добавляет событие kind произведения во все окна одним UPDATE."""
+    moment = moment or timezone.now()
+    weight = math.log(get_setting('WEIGHTS')[kind])
+    values = {
+        window: weight + get_offset(window, moment)
+        for window in get_setting('WINDOWS')
+    }
+    updated = TrendingScore.objects.filter(title_id=title_id).update(
+        score=Case(
+            *(
+                When(window=window, then=(
+                    Greatest(F('score'), Value(value))
+                    + Ln(Value(1.0) + Exp(-Abs(F('score') - Value(value))))
+                ))
+                for window, value in values.items()
+            ),
+            default=F('score'),
+            output_field=FloatField()
+        )
+    )
+    if updated < len(values):
+        existing = set(TrendingScore.objects.filter(
+            title_id=title_id
+        ).values_list('window', flat=True))
+        TrendingScore.objects.bulk_create([
+            TrendingScore(title_id=title_id, window=window, score=value)
+            for window, value in values.items() if window not in existing
+        ], ignore_conflicts=True)
+
+
+def get_events(since):
+    """(произведение, время, вид) отзывов и комментариев после since."""
+    yield from (
+        (title_id, pub_date, 'review')
+        for title_id, pub_date in Review.objects.filter(
+            pub_date__gte=since
+        ).values_list('title_id', 'pub_date').order_by().iterator()
+    )
+    yield from (
+        (title_id, pub_date, 'comment')
+        for title_id, pub_date in Comment.objects.filter(
+            pub_date__gte=since
+        ).values_list('review__title_id', 'pub_date').order_by().iterator()
+    )
+
+
+def calculate(window, moment=None):
+    """{произведение: score} окна по событиям с заметным вкладом."""
+    moment = moment or timezone.now()
+    weights = get_setting('WEIGHTS')
+    # Событие старше horizon весит меньше MIN_SCORE.
+    horizon = get_setting('WINDOWS')[window] * math.log(
+        max(weights.values()) / get_setting('MIN_SCORE')
+    )
+    scores = {}
+    for title_id, pub_date, kind in get_events(
+        moment - dt.timedelta(seconds=max(horizon, 0))
+    ):
+        scores[title_id] = log_add(
+            scores.get(title_id),
+            math.log(weights[kind]) + get_offset(window, pub_date)
+        )
+    threshold = get_threshold(window, moment)
+    return {
+        title_id: score for title_id, score in scores.items()
+        if score >= threshold
+    }
+
+
+def store(window, scores):
+    """Заменяет строки окна на scores."""
+    TrendingScore.objects.filter(window=window).delete()
+    TrendingScore.objects.bulk_create([
+        TrendingScore(title_id=title_id, window=window, score=score)
+        for title_id, score in scores.items()
+    ], batch_size=1000)
+
+
+def get_trending(window, limit=None, moment=None):
+    """Первые limit произведений окна по убыванию активности."""
+    moment = moment or timezone.now()
+    return TrendingScore.objects.filter(
+        window=window, score__gte=get_threshold(window, moment)
+    ).order_by('-score', '-title_id')[:limit or get_setting('SIZE')]
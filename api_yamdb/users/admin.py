@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxMessage, User
 
 
 @admin.register(User)
@@ -15,3 +15,17 @@ class AdminUser(admin.ModelAdmin):
         'confirmation_code',
         'password',
     )
+
+
+@admin.register(OutboxMessage)
+class AdminOutboxMessage(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'created',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_bio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Увеличивается при смене роли, прав или имени: выданные ранее токены перестают действовать.'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:31
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+# Копия users.models.make_confirmation_code_hash на момент миграции:
+# миграция не должна зависеть от текущего кода модели.
+CONFIRMATION_CODE_SALT = 'users.User.confirmation_code'
+
+
+def make_confirmation_code_hash(username, code):
+    return salted_hmac(
+        CONFIRMATION_CODE_SALT, f'{username}:{code}', algorithm='sha256'
+    ).hexdigest()
+
+
+def hash_confirmation_codes(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    users = User.objects.exclude(confirmation_code__isnull=True).exclude(
+        confirmation_code=''
+    )
+    for user in users.only('id', 'username', 'confirmation_code'):
+        User.objects.filter(pk=user.pk).update(
+            confirmation_code=make_confirmation_code_hash(
+                user.username, user.confirmation_code
+            ),
+            confirmation_code_issued_at=timezone.now(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Неудачные попытки ввести текущий код подтверждения.'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_code_issued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='confirmation_code',
+            field=models.CharField(blank=True, help_text='Хеш кода подтверждения, см. set_confirmation_code().', max_length=255, null=True),
+        ),
+        migrations.RunPython(hash_confirmation_codes, migrations.RunPython.noop),
+    ]
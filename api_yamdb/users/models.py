@@ -1,5 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+CONFIRMATION_CODE_SALT = 'users.User.confirmation_code'
+
+
+def get_confirmation_code_setting(name):
+    defaults = {'TTL': 3600, 'MAX_ATTEMPTS': 5}
+    return getattr(settings, 'CONFIRMATION_CODES', {}).get(
+        name, defaults[name]
+    )
+
+
+def make_confirmation_code_hash(username, code):
+    """Хеш кода: код привязан к username и SECRET_KEY."""
+    return salted_hmac(
+        CONFIRMATION_CODE_SALT, f'{username}:{code}', algorithm='sha256'
+    ).hexdigest()
 
 
 class User(AbstractUser):
@@ -18,9 +40,20 @@ class User(AbstractUser):
     bio = models.TextField(blank=True,)
     role = models.CharField(max_length=15, choices=CHOICES, default='user')
     confirmation_code = models.CharField(
-        max_length=255, blank=True, null=True
+        max_length=255, blank=True, null=True,
+        help_text='Хеш кода подтверждения, см. set_confirmation_code().'
+    )
+    confirmation_code_issued_at = models.DateTimeField(null=True, blank=True)
+    confirmation_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Неудачные попытки ввести текущий код подтверждения.'
     )
     password = models.CharField(max_length=255, blank=True, null=True)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        help_text='Увеличивается при смене роли, прав или имени: '
+                  'выданные ранее токены перестают действовать.'
+    )
 
     class Meta:
         constraints = [
@@ -30,5 +63,121 @@ class User(AbstractUser):
             ),
         ]
 
+    # Поля, которые записываются в токен доступа.
+    TOKEN_CLAIMS = ('username', 'role', 'is_superuser', 'is_active')
+    CONFIRMATION_FIELDS = (
+        'confirmation_code', 'confirmation_code_issued_at',
+        'confirmation_attempts',
+    )
+
     def __str__(self) -> str:
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_token_claims()
+        return instance
+
+    def remember_token_claims(self):
+        """Запоминает значения полей, записанные в выданные токены."""
+        self._token_claims = {
+            field: self.__dict__[field] for field in self.TOKEN_CLAIMS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        claims = getattr(self, '_token_claims', {})
+        if any(
+            getattr(self, field) != value for field, value in claims.items()
+        ):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self.remember_token_claims()
+
+    def set_confirmation_code(self, code):
+        """Запоминает хеш нового кода, не сохраняя пользователя."""
+        self.confirmation_code = make_confirmation_code_hash(
+            self.username, code
+        )
+        self.confirmation_code_issued_at = timezone.now()
+        self.confirmation_attempts = 0
+
+    def get_confirmation_code_error(self):
+        """Причина, по которой текущий код нельзя проверять, или None."""
+        if not self.confirmation_code or (
+            self.confirmation_code_issued_at + timedelta(
+                seconds=get_confirmation_code_setting('TTL')
+            ) < timezone.now()
+        ):
+            return 'Код подтверждения устарел, запросите новый.'
+        if (
+            self.confirmation_attempts
+            >= get_confirmation_code_setting('MAX_ATTEMPTS')
+        ):
+            return 'Слишком много попыток, запросите новый код.'
+        return None
+
+    def check_confirmation_code(self, code):
+        """Сравнивает код с хешем за постоянное время, без запросов."""
+        return constant_time_compare(
+            self.confirmation_code,
+            make_confirmation_code_hash(self.username, code)
+        )
+
+    def claim_confirmation_attempt(self):
+        """
+        Засчитывает попытку одним условным UPDATE. False — попытки
+        исчерпаны или код уже сменился: лимит проверяет сама база, и
+        параллельные запросы не обойдут MAX_ATTEMPTS.
+        """
+        return bool(User.objects.filter(
+            pk=self.pk,
+            confirmation_code=self.confirmation_code,
+            confirmation_attempts__lt=get_confirmation_code_setting(
+                'MAX_ATTEMPTS'
+            ),
+        ).update(confirmation_attempts=F('confirmation_attempts') + 1))
+
+    def consume_confirmation_code(self):
+        """
+        Код одноразовый: сбрасывает его условным UPDATE. Из параллельных
+        запросов с одним кодом True получит только один.
+        """
+        return bool(User.objects.filter(
+            pk=self.pk, confirmation_code=self.confirmation_code
+        ).update(
+            confirmation_code=None,
+            confirmation_code_issued_at=None,
+            confirmation_attempts=0,
+        ))
+
+
+class OutboxMessage(models.Model):
+    """Письмо в очереди на отправку."""
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Не отправлять раньше этого времени.'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'), name='outbox_pending'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.subject} → {", ".join(self.recipients)}'
@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_state(request, django_db_blocker):
+    """
+    Очищает состояние, которое не сбрасывается вместе с таблицами
+    моделей между тестами.
+    """
+    from api import metrics
+    from api.authentication import clear_local_versions
+    from api.throttling import reset_store
+    from django.core.cache import cache
+    from reviews import search
+
+    # Письма отправляются сразу после коммита, чтобы тесты видели их
+    # в mail.outbox без фонового потока.
+    settings = request.getfixturevalue('settings')
+    settings.MAIL_OUTBOX = {**settings.MAIL_OUTBOX, 'MODE': 'sync'}
+    cache.clear()
+    metrics.reset()
+    clear_local_versions()
+    reset_store()
+    if request.node.get_closest_marker('django_db'):
+        request.getfixturevalue('django_db_setup')
+        with django_db_blocker.unblock():
+            search.clear_index()
+    yield
@@ -4,7 +4,8 @@ import pytest
 from django.core import mail
 from django.db.utils import IntegrityError
 
-from tests.utils import (invalid_data_for_user_patch_and_creation,
+from tests.utils import (get_confirmation_code,
+                         invalid_data_for_user_patch_and_creation,
                          invalid_data_for_username_and_email_fields)
 
 
@@ -272,6 +273,26 @@ class Test00UserRegistration:
             ', возвращает ответ со статусом 400.'
         )
 
+    def test_00_obtain_jwt_token_valid_data(self, client):
+        valid_data = {
+            'email': 'valid@yamdb.fake',
+            'username': 'valid_username'
+        }
+        client.post(self.url_signup, data=valid_data)
+        response = client.post(self.url_token, data={
+            'username': valid_data['username'],
+            'confirmation_code': get_confirmation_code(valid_data['email'])
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что POST-запрос с корректными `username` и '
+            f'`confirmation_code`, отправленный на эндпоинт `{self.url_token}`'
+            ', возвращает ответ со статусом 200.'
+        )
+        assert response.json().get('token'), (
+            f'Проверьте, что ответ эндпоинта `{self.url_token}` содержит '
+            'JWT-токен в поле `token`.'
+        )
+
     def test_00_registration_me_username_restricted(self, client):
         valid_data = {
             'email': 'valid@yamdb.fake',
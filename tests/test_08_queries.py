@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_comments, create_reviews,
+                         create_single_comment, create_titles,
+                         get_confirmation_code)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueriesAPI:
+
+    def test_01_title_list_queries(self, admin_client, client):
+        url = '/api/v1/titles/'
+        create_titles(admin_client)
+        queries_for_two = count_queries(client, url)
+
+        create_titles_data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': ['horror', 'comedy'],
+                'category': 'films',
+                'description': f'Описание {idx}'
+            }
+            for idx in range(5)
+        ]
+        for data in create_titles_data:
+            response = admin_client.post(url, data=data)
+            assert response.status_code == HTTPStatus.CREATED
+        queries_for_page = count_queries(client, url)
+
+        assert queries_for_page == queries_for_two, (
+            f'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{url}` не зависит от количества произведений на странице. '
+            f'Сейчас: {queries_for_two} запросов для 2 произведений и '
+            f'{queries_for_page} для 7.'
+        )
+
+    def test_02_title_detail_queries(self, admin_client, client, user,
+                                     user_client, moderator,
+                                     moderator_client):
+        _, titles = create_reviews(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        queries = count_queries(client, url)
+        assert queries <= 3, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет не более 3 '
+            f'SQL-запросов: произведение с категорией и рейтингом и жанры. '
+            f'Сейчас выполняется {queries}.'
+        )
+        response = client.get(url)
+        assert response.json().get('rating') == 5, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает средний '
+            'рейтинг произведения в поле `rating`.'
+        )
+
+    def test_03_review_and_comment_list_queries(self, admin_client, client,
+                                                user, user_client,
+                                                moderator, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client}
+        )
+        title_id = titles[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        review_queries = count_queries(client, reviews_url)
+        comment_queries = count_queries(client, comments_url)
+
+        moderator_client.post(reviews_url, data={'text': 'text', 'score': 3})
+        admin_client.post(reviews_url, data={'text': 'text', 'score': 3})
+        for author_client in (moderator_client, admin_client):
+            create_single_comment(
+                author_client, title_id, reviews[0]['id'], 'text'
+            )
+
+        assert count_queries(client, reviews_url) == review_queries, (
+            f'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{reviews_url}` не зависит от количества отзывов.'
+        )
+        assert count_queries(client, comments_url) == comment_queries, (
+            f'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{comments_url}` не зависит от количества комментариев.'
+        )
+        response = client.get(f'{comments_url}?review=id')
+        assert response.json()['results'][0]['review'] == reviews[0]['id'], (
+            f'Проверьте, что GET-запрос к `{comments_url}` с параметром '
+            '`review=id` выводит отзыв его id.'
+        )
+
+    def test_04_auth_user_queries(self, client):
+        url_signup = '/api/v1/auth/signup/'
+        url_token = '/api/v1/auth/token/'
+        data = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+
+        def count_user_selects(url, data):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            assert response.status_code == HTTPStatus.OK
+            return len([
+                query for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'FROM "users_user"' in query['sql']
+            ])
+
+        for attempt in ('регистрации', 'повторном запросе кода'):
+            assert count_user_selects(url_signup, data) == 1, (
+                f'Проверьте, что при {attempt} через `{url_signup}` '
+                'пользователь читается из базы один раз.'
+            )
+        assert count_user_selects(url_token, {
+            'username': data['username'],
+            'confirmation_code': get_confirmation_code(data['email'])
+        }) == 1, (
+            f'Проверьте, что при запросе к `{url_token}` пользователь '
+            'читается из базы один раз.'
+        )
@@ -0,0 +1,120 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+def get_title(title_id):
+    from reviews.models import Title
+    return Title.objects.get(pk=title_id)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09RatingAPI:
+
+    def test_01_rating_follows_reviews(self, admin_client, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        reviews, titles = create_reviews(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            10, 2, 5
+        ), (
+            'Проверьте, что при создании отзыва обновляются сумма, '
+            'количество оценок и рейтинг произведения.'
+        )
+
+        user_client.patch(f'{url}{reviews[0]["id"]}/', data={'score': 9})
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            14, 2, 7
+        ), (
+            'Проверьте, что при изменении оценки в отзыве пересчитывается '
+            'рейтинг произведения.'
+        )
+
+        moderator_client.delete(f'{url}{reviews[1]["id"]}/')
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            9, 1, 9
+        ), (
+            'Проверьте, что при удалении отзыва пересчитывается рейтинг '
+            'произведения.'
+        )
+
+        user.delete()
+        title = get_title(title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            0, 0, None
+        ), (
+            'Проверьте, что при каскадном удалении отзывов вместе с автором '
+            'пересчитывается рейтинг произведения.'
+        )
+
+    def test_02_rebuild_ratings(self, admin_client, client, user,
+                                user_client):
+        from reviews.models import Title
+
+        _, titles = create_reviews(admin_client, {user: user_client})
+        title = get_title(titles[0]['id'])
+        # Рассогласование без сигналов, как после массовой загрузки.
+        Title.objects.filter(pk=title.pk).update(rating_sum=100, rating=100)
+        url = f'/api/v1/titles/{title.pk}/'
+        assert client.get(url).json()['rating'] == 100
+
+        out = StringIO()
+        call_command('rebuild_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений найдено: 1' in out.getvalue()
+        assert get_title(title.id).rating == 100
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        title = get_title(title.id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            5, 1, 5
+        ), (
+            'Проверьте, что команда `rebuild_ratings` исправляет '
+            'рассогласованные рейтинги произведений.'
+        )
+        assert client.get(url).json()['rating'] == 5, (
+            'Проверьте, что после `rebuild_ratings` закэшированные ответы '
+            'показывают исправленный рейтинг.'
+        )
+
+    def test_03_title_update_keeps_rating(self, admin_client, user,
+                                          user_client, monkeypatch):
+        from api.serializers import TitleSerializerCreate
+        from django.db.models import F
+        from reviews.models import Title
+
+        _, titles = create_reviews(admin_client, {user: user_client})
+        title_id = titles[0]['id']
+        update = TitleSerializerCreate.update
+
+        def update_after_review(serializer, instance, validated_data):
+            # Параллельный отзыв меняет счётчики после чтения произведения.
+            Title.objects.filter(pk=instance.pk).update(
+                rating_sum=F('rating_sum') + 7,
+                rating_count=F('rating_count') + 1,
+                rating=6
+            )
+            return update(serializer, instance, validated_data)
+
+        monkeypatch.setattr(
+            TitleSerializerCreate, 'update', update_after_review
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Новое название'}
+        )
+        title = get_title(title_id)
+        assert (
+            title.name, title.rating_sum, title.rating_count, title.rating
+        ) == ('Новое название', 12, 2, 6), (
+            'Проверьте, что изменение произведения сохраняет только '
+            'переданные поля и не затирает счётчики рейтинга.'
+        )
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10SearchAPI:
+
+    def test_01_title_search(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(f'{url}?search=терминат')
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [titles[0]['id']], (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `search` '
+            'находит произведения по началу слова в названии.'
+        )
+
+        response = client.get(f'{url}?search=yippie')
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [titles[1]['id']], (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `search` '
+            'ищет и по описанию произведения.'
+        )
+
+        admin_client.patch(
+            f'{url}{titles[1]["id"]}/', data={'name': 'Терминатор 2'}
+        )
+        response = client.get(f'{url}?search=терминатор')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+    def test_02_search_endpoint(self, admin_client, client, user,
+                                user_client, moderator, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        url = '/api/v1/search/'
+
+        response = client.get(f'{url}?q=number')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` не найден или недоступен анонимному '
+            'пользователю.'
+        )
+        found = {
+            (item['type'], item['id']) for item in response.json()['results']
+        }
+        expected = {('review', review['id']) for review in reviews} | {
+            ('comment', comment['id']) for comment in comments
+        }
+        assert found == expected, (
+            f'Проверьте, что GET-запрос к `{url}` находит отзывы и '
+            'комментарии по тексту.'
+        )
+
+        response = client.get(f'{url}?q=number&type=comment')
+        types = {item['type'] for item in response.json()['results']}
+        assert types == {'comment'}, (
+            f'Проверьте, что параметр `type` ограничивает поиск в `{url}`.'
+        )
+        response = client.get(f'{url}?q=number&type=unknown')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        user_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        response = client.get(f'{url}?q=number&type=review')
+        found = {item['id'] for item in response.json()['results']}
+        assert found == {reviews[1]['id']}, (
+            'Проверьте, что удалённые отзывы исчезают из поискового индекса.'
+        )
+
+    def test_03_rebuild_search_index(self, admin_client, client):
+        from reviews import search
+
+        titles, _, _ = create_titles(admin_client)
+        search.clear_index()
+        url = '/api/v1/titles/?search=терминат'
+        assert client.get(url).json()['count'] == 0
+
+        out = StringIO()
+        call_command(
+            'rebuild_search_index', '--benchmark', 'терминат',
+            '--repeat', '1', stdout=out
+        )
+        assert 'Индекс перестроен' in out.getvalue()
+        assert '"терминат": индекс' in out.getvalue(), (
+            'Проверьте, что команда `rebuild_search_index` с `--benchmark` '
+            'сравнивает поиск по индексу с icontains.'
+        )
+        response = client.get(url)
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], (
+            'Проверьте, что команда `rebuild_search_index` заново '
+            'индексирует произведения.'
+        )
+
+    def test_04_many_hits(self, client):
+        from reviews import search
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Сага, том {number}', description='', year=2000)
+            for number in range(1, 1201)
+        )
+        Title.objects.create(
+            name='Сага о сагах', description='сага сага сага', year=2001
+        )
+        search.rebuild_index()
+        url = '/api/v1/titles/?search=сага'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.json()['count'] == 1201, (
+            f'Проверьте, что `{url}` находит все совпадения, а не первую '
+            'тысячу.'
+        )
+        assert response.json()['results'][0]['name'] == 'Сага о сагах'
+        assert all(
+            len(query['sql']) < 2000 for query in context.captured_queries
+        ), (
+            'Проверьте, что поиск присоединяет индекс в запросе, а не '
+            'передаёт найденные id параметрами.'
+        )
@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_comment, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11PaginationAPI:
+
+    def test_01_comment_cursor_pagination(self, admin_client, client,
+                                          user_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'review', 'score': 5}
+        )
+        review_id = response.json()['id']
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/comments/'
+        created = [
+            create_single_comment(
+                user_client, titles[0]['id'], review_id, f'comment {idx}'
+            ).json()['id']
+            for idx in range(15)
+        ]
+
+        response = client.get(url)
+        assert 'count' in response.json(), (
+            f'Проверьте, что по умолчанию `{url}` использует постраничную '
+            'пагинацию.'
+        )
+
+        response = client.get(f'{url}?pagination=cursor')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data and data['next'], (
+            f'Проверьте, что GET-запрос к `{url}` с параметром '
+            '`pagination=cursor` использует курсорную пагинацию.'
+        )
+        received = [comment['id'] for comment in data['results']]
+        data = client.get(data['next']).json()
+        received += [comment['id'] for comment in data['results']]
+        assert received == created and data['next'] is None, (
+            'Проверьте, что курсорная пагинация отдаёт все комментарии '
+            'по порядку публикации без повторов.'
+        )
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ResponseCacheAPI:
+
+    def test_01_category_cache(self, admin_client, client):
+        url = '/api/v1/categories/'
+        create_categories(admin_client)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из кэша.'
+        )
+        assert response.json()['count'] == 2
+
+        response = client.get(f'{url}?search=Фильм')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ключ кэша учитывает параметры запроса.'
+        )
+
+        admin_client.delete(f'{url}films/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS' and response.json()['count'] == 1, (
+            f'Проверьте, что удаление категории сбрасывает кэш `{url}`.'
+        )
+
+    def test_02_title_cache_invalidation(self, admin_client, client,
+                                         user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+        create_single_review(user_client, titles[0]['id'], 'text', 7)
+        response = client.get(url)
+        assert response.json()['rating'] == 7, (
+            f'Проверьте, что новый отзыв сбрасывает кэш `{url}`.'
+        )
+
+        admin_client.patch(
+            '/api/v1/titles/' + str(titles[0]['id']) + '/',
+            data={'genre': ['drama']}
+        )
+        response = client.get(url)
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'drama'
+        ], 'Проверьте, что изменение жанров сбрасывает кэш произведения.'
+
+    def test_03_cache_metrics(self, admin_client, user_client, client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        url = '/api/v1/metrics/'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['response_cache'] == {
+            'hits': 1, 'misses': 1
+        }, f'Проверьте, что `{url}` отдаёт счётчики попаданий в кэш.'
+
+    def test_04_versions_bumped_on_commit(self, admin_client, client):
+        from django.db import transaction
+        from reviews.models import Category
+
+        url = '/api/v1/categories/'
+        create_categories(admin_client)
+        client.get(url)
+        with transaction.atomic():
+            Category.objects.create(name='Комиксы', slug='comics')
+            # Ответ, построенный до фиксации, остаётся под старой версией.
+            assert client.get(url)['X-Cache'] == 'HIT', (
+                'Проверьте, что версии данных меняются только после '
+                'фиксации транзакции.'
+            )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS' and (
+            response.json()['count'] == 3
+        ), 'Проверьте, что после фиксации транзакции кэш сбрасывается.'
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_single_review
+
+
+def age_versions(seconds):
+    """Переносит все изменения данных на seconds секунд назад."""
+    from django.db.models import F
+    from reviews.models import DataVersion
+
+    DataVersion.objects.update(stamp=F('stamp') - seconds * 1_000_000)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGetAPI:
+
+    def test_01_title_etag(self, admin_client, client, user, user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        age_versions(2)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/', HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        user_client.patch(
+            f'{url}reviews/{reviews[0]["id"]}/', data={'score': 1}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет `ETag` произведения.'
+        )
+        assert response.json()['rating'] == 1
+
+    def test_02_review_list_last_modified(self, admin_client, client,
+                                          user, user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        assert response.get('ETag') and not response.get('Last-Modified'), (
+            'Проверьте, что `Last-Modified` не отдаётся, пока не истекла '
+            'секунда последнего изменения: второе изменение в ту же '
+            'секунду не изменило бы его.'
+        )
+        age_versions(2)
+        last_modified = client.get(url)['Last-Modified']
+
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-Modified-Since` возвращает ответ со статусом 304.'
+        )
+
+        create_single_review(admin_client, titles[0]['id'], 'Новый', 3)
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет `Last-Modified` списка '
+            'отзывов.'
+        )
+
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        etag = client.get(comments_url)['ETag']
+        user_client.post(comments_url, data={'text': 'comment'})
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет `ETag` списка '
+            'комментариев.'
+        )
+        assert len(response.json()['results']) == 1
+
+    def test_03_shared_versions(self, admin_client, client, user,
+                                user_client):
+        from django.core.cache import cache
+
+        _, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+
+        # Версии хранятся в базе: их видит и воркер с другим кэшем.
+        cache.clear()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что версии данных хранятся в базе, а не в '
+            'локальном кэше процесса.'
+        )
+
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'newcomer', 'email': 'newcomer@yamdb.fake'
+        })
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что регистрация пользователя не меняет `ETag` '
+            'отзывов и комментариев.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет `ETag` его отзывов.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
@@ -0,0 +1,63 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ProfilingAPI:
+
+    def test_01_server_timing(self, admin_client, client, settings, caplog):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        settings.API_PROFILING = {'SAMPLE_RATE': 0}
+        response = client.get(url)
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что запросы вне выборки не профилируются.'
+        )
+
+        settings.API_PROFILING = {'SAMPLE_RATE': 1, 'LOG': True}
+        url = f'{url}?page=1'
+        with caplog.at_level(logging.INFO, logger='api.profiling'):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        timing = response.get('Server-Timing', '')
+        for metric in ('db;dur=', 'serializer;dur=', 'view;dur=',
+                       'total;dur='):
+            assert metric in timing, (
+                f'Проверьте, что заголовок Server-Timing содержит `{metric}`.'
+            )
+        assert 'queries"' in timing
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['path'] == url and record['queries'] > 0, (
+            'Проверьте, что профиль запроса пишется в лог одной строкой JSON.'
+        )
+
+    def test_02_duplicate_queries(self, admin_client):
+        from api.profiling import RequestProfile
+        from api.serializers import TitleSerializerRead
+        from reviews.models import Title
+
+        create_titles(admin_client)
+        with RequestProfile(threshold=2) as profile:
+            TitleSerializerRead(Title.objects.all(), many=True).data
+        fields = {item['field'] for item in profile.duplicates.values()}
+        assert fields == {
+            'TitleSerializerRead.category', 'TitleSerializerRead.genre'
+        }, (
+            'Проверьте, что повторяющиеся запросы (N+1) связываются с полем '
+            'сериализатора, которое их вызвало.'
+        )
+
+        with RequestProfile(threshold=2) as profile:
+            TitleSerializerRead(
+                Title.objects.select_related('category').prefetch_related(
+                    'genre'
+                ), many=True
+            ).data
+        assert not profile.duplicates
@@ -0,0 +1,123 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import get_confirmation_code
+
+
+def get_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15StatelessJWTAPI:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    def get_token(self, client, django_user_model, username):
+        client.post(self.url_signup, data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+        user = django_user_model.objects.get(username=username)
+        response = client.post(self.url_token, data={
+            'username': username,
+            'confirmation_code': get_confirmation_code(user.email)
+        })
+        return user, response.json()['token']
+
+    def test_01_token_claims(self, client, django_user_model):
+        user, token = self.get_token(client, django_user_model, 'claims')
+        claims = AccessToken(token)
+        assert (
+            claims['username'], claims['role'], claims['is_superuser']
+        ) == (user.username, user.role, user.is_superuser), (
+            f'Проверьте, что токен от `{self.url_token}` содержит '
+            '`username`, `role` и `is_superuser` пользователя.'
+        )
+
+    def test_02_no_user_query(self, client, django_user_model):
+        user, token = self.get_token(client, django_user_model, 'claims')
+        user.role = 'admin'
+        user.save()
+        _, token = self.get_token(client, django_user_model, 'claims')
+        admin_client = get_client(token)
+        url = '/api/v1/categories/'
+        # Первый запрос кладёт версию токена в кэш.
+        admin_client.post(url, data={'name': 'Фильмы', 'slug': 'films'})
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                url, data={'name': 'Книги', 'slug': 'books'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'users_user' in query['sql']
+        ]
+        assert not user_queries, (
+            'Проверьте, что аутентификация по токену с claims не читает '
+            'пользователя из базы.'
+        )
+
+    def test_03_role_change_revokes_token(self, client, admin_client,
+                                          django_user_model):
+        user, token = self.get_token(client, django_user_model, 'claims')
+        user_client = get_client(token)
+        url = '/api/v1/users/me/'
+        assert user_client.get(url).status_code == HTTPStatus.OK
+
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли выданный ранее токен '
+            'перестаёт действовать.'
+        )
+
+        _, token = self.get_token(client, django_user_model, 'claims')
+        response = get_client(token).get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['role'] == 'moderator'
+
+    def test_04_versions_shared_between_workers(self, client, settings,
+                                                django_user_model):
+        from api.authentication import (clear_local_versions,
+                                        get_token_for_user)
+        from django.db.models import F
+
+        user, token = self.get_token(client, django_user_model, 'claims')
+        user_client = get_client(token)
+        url = '/api/v1/users/me/'
+        assert user_client.get(url).status_code == HTTPStatus.OK
+
+        # Другой воркер сменил роль: сигналы этого процесса не сработали.
+        django_user_model.objects.filter(pk=user.pk).update(
+            role='moderator', token_version=F('token_version') + 1
+        )
+        user.refresh_from_db()
+        response = get_client(get_token_for_user(user)).get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что токен, выданный после смены версии другим '
+            'воркером, принимается сразу.'
+        )
+        assert user_client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+
+        settings.API_STATELESS_JWT = {'LOCAL_TIMEOUT': 0}
+        clear_local_versions()
+        fresh_client = get_client(get_token_for_user(user))
+        assert fresh_client.get(url).status_code == HTTPStatus.OK
+        django_user_model.objects.filter(pk=user.pk).update(
+            token_version=F('token_version') + 1
+        )
+        response = fresh_client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что версия токена перечитывается из базы после '
+            '`LOCAL_TIMEOUT` и отзыв доходит до всех воркеров.'
+        )
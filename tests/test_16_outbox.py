@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16OutboxAPI:
+    url_signup = '/api/v1/auth/signup/'
+
+    def signup(self, client, username):
+        response = client.post(self.url_signup, data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+        return response
+
+    def test_01_signup_enqueues_mail(self, client, settings):
+        from users.models import OutboxMessage
+
+        settings.MAIL_OUTBOX = {**settings.MAIL_OUTBOX, 'MODE': 'command'}
+        outbox_before = len(mail.outbox)
+        self.signup(client, 'first')
+        self.signup(client, 'second')
+        assert len(mail.outbox) == outbox_before, (
+            f'Проверьте, что POST-запрос к `{self.url_signup}` не отправляет '
+            'письмо сам, а ставит его в очередь.'
+        )
+        assert OutboxMessage.objects.filter(sent_at__isnull=True).count() == 2
+
+        call_command('drain_outbox', stdout=StringIO())
+        assert {
+            address for message in mail.outbox[outbox_before:]
+            for address in message.to
+        } == {'first@yamdb.fake', 'second@yamdb.fake'}, (
+            'Проверьте, что команда `drain_outbox` отправляет письма из '
+            'очереди.'
+        )
+        assert not OutboxMessage.objects.filter(sent_at__isnull=True).exists()
+
+    def test_02_retry_with_backoff(self, client, settings, monkeypatch):
+        from api import outbox
+        from users.models import OutboxMessage
+
+        settings.MAIL_OUTBOX = {
+            **settings.MAIL_OUTBOX, 'MODE': 'command', 'RETRY_DELAY': 10
+        }
+        self.signup(client, 'first')
+
+        def fail(*args, **kwargs):
+            raise SMTPException('Почтовый сервер недоступен')
+
+        monkeypatch.setattr(outbox.EmailMessage, 'send', fail)
+        assert outbox.drain() == 0
+        message = OutboxMessage.objects.get()
+        assert message.attempts == 1 and message.sent_at is None, (
+            'Проверьте, что неотправленное письмо остаётся в очереди.'
+        )
+        delay = message.next_attempt_at - timezone.now()
+        assert timedelta(seconds=5) < delay <= timedelta(seconds=10), (
+            'Проверьте, что повторная отправка откладывается на RETRY_DELAY.'
+        )
+
+        monkeypatch.undo()
+        assert outbox.drain() == 0, (
+            'Проверьте, что письмо не отправляется раньше next_attempt_at.'
+        )
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        outbox_before = len(mail.outbox)
+        assert outbox.drain() == 1
+        assert len(mail.outbox) == outbox_before + 1
+
+    def test_03_mass_sending(self):
+        from api import metrics
+        from api.utility import RateLimiter, send_mass_messages
+        from django.core.mail import EmailMessage, get_connection
+
+        class CountingConnection(type(get_connection())):
+            opened = 0
+
+            def open(self):
+                CountingConnection.opened += 1
+                return super().open()
+
+        messages = [
+            EmailMessage(
+                'Тема', 'Текст', 'from@yamdb.fake', [f'user{n}@yamdb.fake']
+            )
+            for n in range(3)
+        ]
+        outbox_before = len(mail.outbox)
+        started = time.monotonic()
+        errors = send_mass_messages(
+            messages, RateLimiter(20), CountingConnection()
+        )
+        assert errors == [None] * 3
+        assert len(mail.outbox) == outbox_before + 3
+        assert CountingConnection.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        assert time.monotonic() - started >= 0.1, (
+            'Проверьте, что скорость отправки ограничивается RateLimiter.'
+        )
+        assert metrics.snapshot()['mail']['sent'] == 3
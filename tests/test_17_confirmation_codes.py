@@ -0,0 +1,105 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from tests.utils import get_confirmation_code
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ConfirmationCodesAPI:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+    data = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+
+    def get_token(self, client, code):
+        return client.post(self.url_token, data={
+            'username': self.data['username'], 'confirmation_code': code
+        })
+
+    def test_01_code_is_hashed_and_single_use(self, client,
+                                              django_user_model):
+        client.post(self.url_signup, data=self.data)
+        code = get_confirmation_code(self.data['email'])
+        user = django_user_model.objects.get(username=self.data['username'])
+        assert code not in user.confirmation_code, (
+            'Проверьте, что код подтверждения хранится в базе хешем.'
+        )
+        assert self.get_token(client, code).status_code == HTTPStatus.OK
+        assert self.get_token(client, code).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что код подтверждения можно использовать один раз.'
+
+        client.post(self.url_signup, data=self.data)
+        new_code = get_confirmation_code(self.data['email'])
+        assert self.get_token(client, new_code).status_code == HTTPStatus.OK, (
+            f'Проверьте, что повторный POST-запрос к `{self.url_signup}` '
+            'выдаёт зарегистрированному пользователю новый код.'
+        )
+
+    def test_02_attempts_limit(self, client, settings):
+        settings.CONFIRMATION_CODES = {'TTL': 3600, 'MAX_ATTEMPTS': 2}
+        client.post(self.url_signup, data=self.data)
+        code = get_confirmation_code(self.data['email'])
+        wrong = '0' * 7
+        for _ in range(2):
+            response = self.get_token(client, wrong)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = self.get_token(client, code)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что после MAX_ATTEMPTS неверных попыток код '
+            'подтверждения перестаёт действовать.'
+        )
+
+    def test_03_expired_codes(self, client, django_user_model):
+        client.post(self.url_signup, data=self.data)
+        code = get_confirmation_code(self.data['email'])
+        users = django_user_model.objects.filter(
+            username=self.data['username']
+        )
+        users.update(
+            confirmation_code_issued_at=timezone.now() - timedelta(days=1)
+        )
+        assert self.get_token(client, code).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что просроченный код подтверждения не принимается.'
+
+        call_command('purge_confirmation_codes', stdout=StringIO())
+        assert users.get().confirmation_code is None, (
+            'Проверьте, что команда `purge_confirmation_codes` удаляет '
+            'просроченные коды.'
+        )
+
+    def test_04_concurrent_requests(self, client, settings,
+                                    django_user_model):
+        settings.CONFIRMATION_CODES = {'TTL': 3600, 'MAX_ATTEMPTS': 2}
+        client.post(self.url_signup, data=self.data)
+        code = get_confirmation_code(self.data['email'])
+        # Экземпляры, прочитанные параллельными запросами до UPDATE.
+        first, second, third = (
+            django_user_model.objects.get(username=self.data['username'])
+            for _ in range(3)
+        )
+        assert first.claim_confirmation_attempt()
+        assert second.claim_confirmation_attempt()
+        assert not third.claim_confirmation_attempt(), (
+            'Проверьте, что лимит попыток проверяется в базе, а не по '
+            'прочитанному ранее счётчику.'
+        )
+
+        django_user_model.objects.filter(pk=first.pk).update(
+            confirmation_attempts=0
+        )
+        assert first.check_confirmation_code(code)
+        assert second.check_confirmation_code(code)
+        assert first.consume_confirmation_code()
+        assert not second.consume_confirmation_code(), (
+            'Проверьте, что из параллельных запросов с одним кодом '
+            'подтверждения токен получает только один.'
+        )
+        assert self.get_token(client, code).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ThrottlingAPI:
+
+    def test_01_auth_throttling(self, client, settings):
+        from api import metrics
+
+        settings.API_THROTTLING = {
+            **settings.API_THROTTLING, 'RATES': {'auth': '3/min'}
+        }
+        url = '/api/v1/auth/token/'
+        data = {'username': 'unknown', 'confirmation_code': '000000'}
+        for _ in range(3):
+            response = client.post(url, data=data)
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post(url, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частота POST-запросов к `{url}` ограничена.'
+        )
+        assert 'Retry-After' in response
+        assert metrics.snapshot()['throttling']['auth_rejected'] == 1, (
+            'Проверьте, что отклонённые запросы учитываются в метриках.'
+        )
+
+    def test_02_write_throttling_by_user(self, admin_client, user_client,
+                                         moderator_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.API_THROTTLING = {
+            **settings.API_THROTTLING, 'RATES': {'write': '1/min'}
+        }
+        data = {'text': 'Отзыв', 'score': 5}
+        urls = [f'/api/v1/titles/{title["id"]}/reviews/' for title in titles]
+        response = user_client.post(urls[0], data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(urls[1], data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что частота создания отзывов ограничена.'
+        )
+        response = moderator_client.post(urls[1], data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что лимит считается для каждого пользователя '
+            'отдельно.'
+        )
+        assert user_client.get(urls[1]).status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запросы не ограничиваются.'
+        )
+
+
+@pytest.mark.parametrize('store_path', [
+    'api.throttling.LocalMemoryStore',
+    'api.throttling.CacheStore',
+    'api.throttling.SQLiteStore',
+])
+def test_token_bucket_stores(store_path, tmp_path):
+    from django.utils.module_loading import import_string
+
+    options = {'path': str(tmp_path / 'throttle.sqlite3')} if (
+        store_path.endswith('SQLiteStore')
+    ) else {}
+    store = import_string(store_path)(**options)
+    store.clear()
+    results = [store.consume('key', 2, 1 / 60)[0] for _ in range(3)]
+    assert results == [True, True, False], (
+        f'Проверьте, что {store_path} пропускает не больше жетонов, чем '
+        'помещается в ведро.'
+    )
+    allowed, wait = store.consume('key', 2, 1 / 60)
+    assert not allowed and 0 < wait <= 60
+    assert store.consume('other', 2, 1 / 60)[0], (
+        'Проверьте, что вёдра разных ключей независимы.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_auth_throttling_by_remote_addr(client, settings):
+    settings.API_THROTTLING = {
+        **settings.API_THROTTLING, 'RATES': {'auth': '2/min'}
+    }
+    url = '/api/v1/auth/signup/'
+    data = {'username': 'unknown', 'email': 'unknown@yamdb.fake'}
+    for number in range(2):
+        response = client.patch(
+            f'{url}0/', HTTP_X_FORWARDED_FOR=f'10.0.0.{number}'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.post(
+        url, data=data, HTTP_X_FORWARDED_FOR='10.0.0.100'
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+        f'Проверьте, что PATCH-запросы к `{url}` ограничиваются '
+        'вместе с POST, а без прокси IP клиента не берётся из '
+        'X-Forwarded-For.'
+    )
+
+
+def test_token_bucket_store_is_abstract():
+    from api.throttling import BaseStore
+
+    with pytest.raises(TypeError):
+        BaseStore()
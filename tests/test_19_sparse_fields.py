@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    return response.json(), [
+        query['sql'] for query in context.captured_queries
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19SparseFieldsAPI:
+
+    def test_01_title_fields(self, admin_client, client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/?fields=id,name,rating'
+        data, queries = get_with_queries(client, url)
+        assert set(data['results'][0]) == {'id', 'name', 'rating'}, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает только '
+            'перечисленные в `fields` поля.'
+        )
+        assert not any(
+            'reviews_category' in sql or 'reviews_genre' in sql
+            or 'description' in sql for sql in queries
+        ), (
+            f'Проверьте, что GET-запрос к `{url}` не загружает категории, '
+            'жанры и описания произведений.'
+        )
+
+    def test_02_title_omit(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/?omit=genre,description'
+        data, queries = get_with_queries(client, url)
+        assert set(data) == {'id', 'name', 'year', 'category', 'rating'}, (
+            f'Проверьте, что GET-запрос к `{url}` не возвращает поля из '
+            '`omit`.'
+        )
+        assert data['category']['slug'] == titles[0]['category']
+        assert not any('reviews_genre' in sql for sql in queries), (
+            f'Проверьте, что GET-запрос к `{url}` не загружает жанры.'
+        )
+
+    def test_03_unknown_field(self, client):
+        for param in ('fields', 'omit'):
+            url = f'/api/v1/genres/?{param}=name,unknown'
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что GET-запрос к `{url}` с неизвестным полем '
+                'возвращает ответ со статусом 400.'
+            )
+
+    def test_04_review_and_comment_fields(self, admin_client, client, user,
+                                          user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for url in (
+            f'{reviews_url}?fields=id,score',
+            f'{reviews_url}?fields=id,score&pagination=cursor',
+        ):
+            data, queries = get_with_queries(client, url)
+            assert {
+                tuple(review) for review in data['results']
+            } == {('id', 'score')}, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает только '
+                'перечисленные в `fields` поля.'
+            )
+            assert not any('users_user' in sql for sql in queries), (
+                f'Проверьте, что GET-запрос к `{url}` не присоединяет '
+                'авторов отзывов.'
+            )
+
+        url = f'{reviews_url}{reviews[0]["id"]}/comments/?omit=author,review'
+        data, queries = get_with_queries(client, url)
+        assert set(data['results'][0]) == {'id', 'text', 'pub_date'}
+        assert not any('users_user' in sql for sql in queries), (
+            f'Проверьте, что GET-запрос к `{url}` не присоединяет '
+            'авторов комментариев.'
+        )
+
+    def test_05_users_and_writes(self, admin_client):
+        url = '/api/v1/users/?fields=username'
+        data, _ = get_with_queries(admin_client, url)
+        assert {tuple(user) for user in data['results']} == {('username',)}
+
+        response = admin_client.post(
+            '/api/v1/categories/?fields=slug',
+            data={'name': 'Фильмы', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json() == {'name': 'Фильмы', 'slug': 'films'}, (
+            'Проверьте, что `fields` и `omit` не влияют на запросы, '
+            'изменяющие данные.'
+        )
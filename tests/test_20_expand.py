@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_single_comment
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+        'статусом 200.'
+    )
+    return response.json(), len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ExpandAPI:
+
+    def test_01_title_expand(self, admin_client, client, user, user_client,
+                             moderator, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews.comments'
+        data, queries = get_with_queries(client, url)
+        assert [review['id'] for review in data.get('reviews', [])] == [
+            review['id'] for review in reviews
+        ], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает отзывы '
+            'произведения в поле `reviews`.'
+        )
+        assert [
+            comment['text'] for comment in data['reviews'][0]['comments']
+        ] == [comment['text'] for comment in comments], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает комментарии '
+            'каждого отзыва в поле `comments`.'
+        )
+        assert data['reviews'][1]['comments'] == []
+        assert data['reviews'][0]['author'] == user.username
+
+        # Ещё комментарии не должны добавлять запросов.
+        for _ in range(3):
+            create_single_comment(
+                user_client, titles[0]['id'], reviews[1]['id'], 'Ещё'
+            )
+        _, more_queries = get_with_queries(client, f'{url}&page=1')
+        assert more_queries == queries, (
+            f'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{url}` не зависит от количества отзывов и комментариев. '
+            f'Сейчас: {queries} и {more_queries}.'
+        )
+
+    def test_02_expand_limits(self, admin_client, client, user, user_client,
+                              moderator, moderator_client, settings):
+        settings.API_EXPAND = {'LIMITS': {'reviews': 1, 'comments': 1}}
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews.comments'
+        data, _ = get_with_queries(client, url)
+        assert len(data['reviews']) == 1, (
+            'Проверьте, что в ответ встраивается не больше '
+            "`API_EXPAND['LIMITS']['reviews']` отзывов."
+        )
+        assert [
+            comment['id'] for comment in data['reviews'][0]['comments']
+        ] == [comments[0]['id']], (
+            'Проверьте, что в отзыв встраивается не больше '
+            "`API_EXPAND['LIMITS']['comments']` первых комментариев."
+        )
+
+    def test_03_review_list_expand(self, admin_client, client, user,
+                                   user_client, moderator, moderator_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {user: user_client, moderator: moderator_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?expand=comments'
+        data, queries = get_with_queries(client, url)
+        assert [
+            len(review['comments']) for review in data['results']
+        ] == [len(comments), 0], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает комментарии '
+            'каждого отзыва в поле `comments`.'
+        )
+        # Версии данных, count, отзывы с авторами, комментарии и авторы
+        # комментариев.
+        assert queries <= 5, (
+            f'Проверьте, что GET-запрос к `{url}` загружает комментарии '
+            f'всех отзывов одним запросом. Сейчас запросов: {queries}.'
+        )
+
+        # Новый комментарий меняет ответ, хотя отзывы не изменились.
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[1]['id'], 'Новый'
+        )
+        data, _ = get_with_queries(client, url)
+        assert len(data['results'][1]['comments']) == 1
+
+    def test_04_unknown_expand(self, admin_client, client, user,
+                               user_client):
+        _, _, titles = create_comments(admin_client, {user: user_client})
+        for url in (
+            f'/api/v1/titles/{titles[0]["id"]}/?expand=genre',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/?expand=reviews',
+        ):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что GET-запрос к `{url}` с неизвестной связью '
+                'в `expand` возвращает ответ со статусом 400.'
+            )
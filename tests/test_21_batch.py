@@ -0,0 +1,111 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+def post_batch(client, data):
+    return client.post(
+        Test21BatchAPI.url, data=json.dumps(data),
+        content_type='application/json'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21BatchAPI:
+    url = '/api/v1/batch/'
+
+    def test_01_batch_get(self, admin_client, client):
+        titles, categories, _ = create_titles(admin_client)
+        response = post_batch(client, {'requests': [
+            {'method': 'GET', 'path': f'/api/v1/titles/{titles[0]["id"]}/'},
+            {'method': 'GET', 'path': '/api/v1/categories/?search=Фильм'},
+            {'method': 'GET', 'path': '/api/v1/titles/100500/'},
+        ]})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос к `{self.url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        responses = response.json()['responses']
+        assert [item['status'] for item in responses] == [200, 200, 404], (
+            f'Проверьте, что ответ на POST-запрос к `{self.url}` содержит '
+            'статусы всех запросов пакета по порядку.'
+        )
+        assert responses[0]['body']['name'] == titles[0]['name']
+        assert responses[1]['body']['count'] == 1
+        assert all(
+            isinstance(item['duration_ms'], float) for item in responses
+        ), (
+            'Проверьте, что для каждого запроса пакета возвращается время '
+            'выполнения в `duration_ms`.'
+        )
+
+    def test_02_batch_permissions(self, client, admin_client):
+        data = {'requests': [{
+            'method': 'POST', 'path': '/api/v1/categories/',
+            'body': {'name': 'Фильмы', 'slug': 'films'}
+        }]}
+        response = post_batch(client, data)
+        assert response.json()['responses'][0]['status'] == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что запросы пакета проверяют права так же, как '
+            'обычные запросы.'
+        )
+        response = post_batch(admin_client, data)
+        assert response.json()['responses'][0]['status'] == (
+            HTTPStatus.CREATED
+        ), (
+            'Проверьте, что запросы пакета выполняются от имени '
+            'пользователя, отправившего пакет.'
+        )
+
+    def test_03_batch_atomic(self, admin_client):
+        category = {'name': 'Фильмы', 'slug': 'films'}
+        requests = [
+            {'method': 'POST', 'path': '/api/v1/categories/',
+             'body': category},
+            {'method': 'POST', 'path': '/api/v1/categories/',
+             'body': category},
+        ]
+        response = post_batch(
+            admin_client, {'requests': requests, 'atomic': True}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что атомарный пакет с ошибкой возвращает ответ со '
+            'статусом 400.'
+        )
+        assert [
+            item['status'] for item in response.json()['responses']
+        ] == [201, 400]
+        assert admin_client.get('/api/v1/categories/').json()['count'] == 0, (
+            'Проверьте, что ошибка в атомарном пакете откатывает все '
+            'его запросы.'
+        )
+
+        response = post_batch(admin_client, {'requests': requests})
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get('/api/v1/categories/').json()['count'] == 1
+
+    def test_04_batch_limits(self, client, settings):
+        settings.API_BATCH = {'MAX_REQUESTS': 2}
+        item = {'method': 'GET', 'path': '/api/v1/genres/'}
+        for data in (
+            {'requests': [item] * 3},
+            {'requests': []},
+            {'requests': [{'method': 'PUT', 'path': '/api/v1/genres/'}]},
+            {'requests': [{'method': 'GET', 'path': '/admin/'}]},
+        ):
+            response = post_batch(client, data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что POST-запрос к `{self.url}` с данными '
+                f'{data} возвращает ответ со статусом 400.'
+            )
+        response = post_batch(client, {'requests': [
+            {'method': 'POST', 'path': self.url, 'body': {'requests': []}}
+        ]})
+        assert response.json()['responses'][0]['status'] == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что пакет не может содержать пакетные запросы.'
@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from tests.utils import create_single_review, create_titles
+
+
+def get_query_plan(params):
+    from api.filters import TitleFilter
+    from api.views import TitleViewSet
+
+    queryset = TitleFilter(params, TitleViewSet.queryset.all()).qs[:10]
+    sql, sql_params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', sql_params)
+        return ' '.join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleOrderingAPI:
+    url = '/api/v1/titles/'
+
+    def create_rated_titles(self, admin_client, user_client,
+                            moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 6)
+        create_single_review(moderator_client, titles[0]['id'], 'Так', 4)
+        create_single_review(user_client, titles[1]['id'], 'Отлично', 9)
+        return titles
+
+    def get_names(self, client, query):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}?{query}` возвращает '
+            'ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_ordering(self, admin_client, client, user_client,
+                         moderator_client):
+        titles = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        first, second = titles[0]['name'], titles[1]['name']
+        for query, expected in (
+            ('ordering=-rating', [second, first]),
+            ('ordering=rating', [first, second]),
+            ('ordering=-reviews_count', [first, second]),
+            ('ordering=-year', [second, first]),
+            ('ordering=-name', sorted([first, second], reverse=True)),
+        ):
+            assert self.get_names(client, query) == expected, (
+                f'Проверьте, что GET-запрос к `{self.url}?{query}` '
+                'возвращает произведения в заданном порядке.'
+            )
+        response = client.get(f'{self.url}?ordering=description')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что сортировка по неподдерживаемому полю '
+            'возвращает ответ со статусом 400.'
+        )
+
+    def test_02_range_filters(self, admin_client, client, user_client,
+                              moderator_client):
+        titles = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        first, second = titles[0]['name'], titles[1]['name']
+        for query, expected in (
+            (f'year_min={titles[1]["year"]}', [second]),
+            (f'year_max={titles[0]["year"]}', [first]),
+            ('rating_min=6', [second]),
+            ('rating_min=5&ordering=rating', [first, second]),
+        ):
+            assert self.get_names(client, query) == expected, (
+                f'Проверьте, что GET-запрос к `{self.url}?{query}` '
+                'возвращает только подходящие произведения.'
+            )
+
+    def test_03_query_plans(self):
+        for params, index in (
+            ({'ordering': '-rating'}, 'title_rating'),
+            ({'ordering': '-rating', 'rating_min': 5}, 'title_rating'),
+            ({'ordering': 'year'}, 'title_year'),
+            ({'ordering': '-reviews_count'}, 'title_reviews_count'),
+            ({}, 'title_name'),
+        ):
+            plan = get_query_plan(params)
+            assert index in plan and 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что список произведений с параметрами {params} '
+                f'читается по индексу `{index}` без сортировки. '
+                f'План запроса: {plan}'
+            )
+        plan = get_query_plan(
+            {'category': 'films', 'year_min': 1990, 'year_max': 2000}
+        )
+        assert 'title_category_year' in plan, (
+            'Проверьте, что фильтр по категории и годам использует индекс '
+            f'`title_category_year`. План запроса: {plan}'
+        )
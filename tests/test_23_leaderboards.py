@@ -0,0 +1,167 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23LeaderboardsAPI:
+    url = '/api/v1/titles/top/'
+
+    @pytest.fixture(autouse=True)
+    def prior(self, settings):
+        settings.LEADERBOARDS = {'SIZE': 100, 'MIN_VOTES': 2, 'MEAN': 5.5}
+
+    def create_rated_titles(self, admin_client, user_client,
+                            moderator_client):
+        """Одна десятка у первого произведения против трёх девяток."""
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Шедевр', 10)
+        reviews = [
+            create_single_review(
+                client, titles[1]['id'], 'Хорошо', 9
+            ).json()
+            for client in (user_client, moderator_client, admin_client)
+        ]
+        return titles, categories, genres, reviews
+
+    def get_ranking(self, client, query=''):
+        response = client.get(f'{self.url}{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}{query}` возвращает '
+            'ответ со статусом 200.'
+        )
+        return [(title['name'], title['score']) for title in response.json()]
+
+    def test_01_weighted_ranking(self, admin_client, client, user_client,
+                                 moderator_client):
+        titles, _, _, _ = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        assert self.get_ranking(client) == [
+            (titles[1]['name'], pytest.approx((27 + 2 * 5.5) / 5)),
+            (titles[0]['name'], pytest.approx((10 + 2 * 5.5) / 3)),
+        ], (
+            f'Проверьте, что `{self.url}` сортирует произведения по '
+            'байесовскому рейтингу: (сумма оценок + m * C) / '
+            '(количество оценок + m).'
+        )
+
+    def test_02_incremental_updates(self, admin_client, client, user_client,
+                                    moderator_client):
+        titles, _, _, reviews = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'score': 1})
+        admin_client.delete(f'{url}{reviews[1]["id"]}/')
+        assert self.get_ranking(client) == [
+            (titles[0]['name'], pytest.approx((10 + 2 * 5.5) / 3)),
+            (titles[1]['name'], pytest.approx((10 + 2 * 5.5) / 4)),
+        ], (
+            'Проверьте, что изменение и удаление отзывов сразу меняет '
+            'рейтинговую таблицу.'
+        )
+
+    def test_03_category_and_genre_boards(self, admin_client, client,
+                                          user_client, moderator_client):
+        titles, categories, genres, _ = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        for query, expected in (
+            (f'?category={categories[0]["slug"]}', [titles[0]['name']]),
+            (f'?genre={genres[2]["slug"]}', [titles[1]['name']]),
+            ('?limit=1', [titles[1]['name']]),
+        ):
+            assert [
+                name for name, _ in self.get_ranking(client, query)
+            ] == expected, (
+                f'Проверьте, что `{self.url}{query}` возвращает только '
+                'произведения из этой таблицы.'
+            )
+
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={
+            'genre': [genres[0]['slug']], 'category': categories[0]['slug']
+        })
+        assert [
+            name for name, _ in self.get_ranking(
+                client, f'?genre={genres[0]["slug"]}'
+            )
+        ] == [titles[1]['name'], titles[0]['name']], (
+            'Проверьте, что смена жанров произведения переносит его в '
+            'таблицы новых жанров.'
+        )
+        assert self.get_ranking(client, f'?genre={genres[2]["slug"]}') == []
+
+        for query, status in (
+            ('?limit=0', HTTPStatus.BAD_REQUEST),
+            ('?limit=101', HTTPStatus.BAD_REQUEST),
+            ('?genre=unknown', HTTPStatus.NOT_FOUND),
+        ):
+            assert client.get(f'{self.url}{query}').status_code == status
+
+    def test_04_constant_queries(self, admin_client, client, user_client,
+                                 moderator_client):
+        self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.get_ranking(client, '?limit=50')
+        assert len(context.captured_queries) <= 3, (
+            f'Проверьте, что `{self.url}` читает версии данных, таблицу '
+            'одним запросом по индексу и одним запросом загружает жанры.'
+        )
+
+    def test_05_rebuild(self, admin_client, client, user_client,
+                        moderator_client, settings):
+        from reviews.models import TitleRank
+
+        titles, _, _, _ = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        # Ответ кэшируется: команда должна сменить его версию.
+        self.get_ranking(client, '?limit=2')
+        TitleRank.objects.all().delete()
+        settings.LEADERBOARDS = {'SIZE': 100, 'MIN_VOTES': 2, 'MEAN': None}
+        call_command('rebuild_leaderboards', verbosity=0)
+
+        mean = (10 + 27) / 4
+        assert self.get_ranking(client, '?limit=2') == [
+            (titles[0]['name'], pytest.approx((10 + 2 * mean) / 3)),
+            (titles[1]['name'], pytest.approx((27 + 2 * mean) / 5)),
+        ], (
+            'Проверьте, что команда `rebuild_leaderboards` восстанавливает '
+            'таблицы и пересчитывает среднюю оценку по всем отзывам.'
+        )
+
+    def test_06_mean_shared_between_workers(self, admin_client, client,
+                                            user_client, moderator_client,
+                                            settings):
+        from reviews.models import LeaderboardMean
+
+        settings.LEADERBOARDS = {'SIZE': 100, 'MIN_VOTES': 2, 'MEAN': None}
+        titles, _, _, reviews = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        # C сохранён в базе, когда отзывов ещё не было.
+        assert LeaderboardMean.objects.get().mean == 5.5
+        # Команда в другом процессе пересчитала C: кэш этого процесса
+        # о нём не знает, но новые отзывы учитывают новое значение.
+        LeaderboardMean.objects.update(mean=3)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/', data={'score': 6}
+        )
+        assert dict(self.get_ranking(client))[titles[1]['name']] == (
+            pytest.approx((24 + 2 * 3) / 5)
+        ), (
+            'Проверьте, что средняя оценка C хранится в базе и одинакова '
+            'для всех воркеров.'
+        )
+
+        call_command('rebuild_leaderboards', verbosity=0)
+        assert LeaderboardMean.objects.get().mean == pytest.approx(34 / 4)
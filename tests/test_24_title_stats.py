@@ -0,0 +1,116 @@
+import math
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24TitleStatsAPI:
+
+    def create_reviews(self, admin_client, clients, scores):
+        titles, _, _ = create_titles(admin_client)
+        reviews = [
+            create_single_review(
+                client, titles[0]['id'], 'Отзыв', score
+            ).json()
+            for client, score in zip(clients, scores)
+        ]
+        return titles, reviews
+
+    def get_stats(self, client, title_id):
+        url = f'/api/v1/titles/{title_id}/stats/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert not any(
+            'reviews_review' in query['sql']
+            for query in context.captured_queries
+        ), f'Проверьте, что `{url}` не читает отзывы произведения.'
+        return response.json()
+
+    def test_01_stats(self, admin_client, client, user_client,
+                      moderator_client):
+        titles, _ = self.create_reviews(
+            admin_client, (user_client, moderator_client, admin_client),
+            (10, 9, 2)
+        )
+        stats = self.get_stats(client, titles[0]['id'])
+        mean = 7
+        assert stats == {
+            'count': 3,
+            'mean': pytest.approx(mean),
+            'median': 9,
+            'stddev': pytest.approx(
+                math.sqrt(((10 - mean) ** 2 + (9 - mean) ** 2
+                           + (2 - mean) ** 2) / 3)
+            ),
+            'histogram': [0, 1, 0, 0, 0, 0, 0, 0, 1, 1],
+        }, (
+            'Проверьте, что статистика произведения содержит количество, '
+            'среднее, медиану и стандартное отклонение оценок и их '
+            'распределение по 10 значениям.'
+        )
+
+        stats = self.get_stats(client, titles[1]['id'])
+        assert stats == {
+            'count': 0, 'mean': None, 'median': None, 'stddev': None,
+            'histogram': [0] * 10,
+        }
+        response = client.get('/api/v1/titles/100500/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_incremental_updates(self, admin_client, client, user_client,
+                                    moderator_client):
+        titles, reviews = self.create_reviews(
+            admin_client, (user_client, moderator_client), (4, 6)
+        )
+        title_id = titles[0]['id']
+        assert self.get_stats(client, title_id)['median'] == 5, (
+            'Проверьте, что при чётном количестве оценок медиана равна '
+            'среднему двух средних оценок.'
+        )
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'score': 8})
+        admin_client.delete(f'{url}{reviews[1]["id"]}/')
+        stats = self.get_stats(client, title_id)
+        assert (stats['count'], stats['histogram']) == (
+            1, [0, 0, 0, 0, 0, 0, 0, 1, 0, 0]
+        ), (
+            'Проверьте, что изменение и удаление отзывов сразу меняет '
+            'распределение оценок.'
+        )
+
+    def test_03_rebuild(self, admin_client, client, user_client,
+                        moderator_client):
+        from reviews.models import ScoreHistogram
+
+        titles, _ = self.create_reviews(
+            admin_client, (user_client, moderator_client), (3, 3)
+        )
+        title_id = titles[0]['id']
+        ScoreHistogram.objects.filter(title_id=title_id).update(score_3=7)
+        ScoreHistogram.objects.exclude(title_id=title_id).delete()
+        assert self.get_stats(client, title_id)['count'] == 7
+
+        call_command('rebuild_ratings', verbosity=0)
+        assert ScoreHistogram.objects.count() == 2, (
+            'Проверьте, что команда `rebuild_ratings` создаёт недостающие '
+            'распределения оценок.'
+        )
+        histogram = ScoreHistogram.objects.get(title_id=title_id)
+        assert histogram.get_counts() == [0, 0, 2, 0, 0, 0, 0, 0, 0, 0], (
+            'Проверьте, что команда `rebuild_ratings` исправляет '
+            'распределения оценок по отзывам.'
+        )
+        assert self.get_stats(client, title_id)['count'] == 2, (
+            'Проверьте, что после `rebuild_ratings` закэшированная '
+            'статистика произведения показывает исправленные оценки.'
+        )
@@ -0,0 +1,124 @@
+import math
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SimilarTitlesAPI:
+
+    @pytest.fixture(autouse=True)
+    def recommendations(self, settings):
+        settings.RECOMMENDATIONS = {
+            'SIZE': 10, 'MIN_COMMON': 2, 'CHUNK_SIZE': 500
+        }
+
+    def create_rated_titles(self, admin_client, clients, scores):
+        titles, _, _ = create_titles(admin_client)
+        for client, (first, second) in zip(clients, scores):
+            create_single_review(client, titles[0]['id'], 'Отзыв', first)
+            create_single_review(client, titles[1]['id'], 'Отзыв', second)
+        return titles
+
+    def get_similar(self, client, title_id, query=''):
+        url = f'/api/v1/titles/{title_id}/similar/{query}'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        return [
+            (title['name'], title['similarity']) for title in response.json()
+        ]
+
+    def test_01_similar(self, admin_client, client, user_client,
+                        moderator_client):
+        titles = self.create_rated_titles(
+            admin_client, (user_client, moderator_client, admin_client),
+            ((10, 9), (9, 8), (2, 10))
+        )
+        assert self.get_similar(client, titles[0]['id']) == []
+
+        call_command('rebuild_similar_titles', verbosity=0)
+        # Оценки сдвинуты к середине шкалы: 2 * score - 11.
+        similarity = (9 * 7 + 7 * 5 - 7 * 9) / math.sqrt(
+            (9 ** 2 + 7 ** 2 + 7 ** 2) * (7 ** 2 + 5 ** 2 + 9 ** 2)
+        )
+        for title, other in ((titles[0], titles[1]), (titles[1], titles[0])):
+            assert self.get_similar(client, title['id']) == [
+                (other['name'], pytest.approx(similarity))
+            ], (
+                'Проверьте, что после команды `rebuild_similar_titles` '
+                '`/api/v1/titles/{id}/similar/` возвращает произведения, '
+                'похожие по косинусу оценок общих авторов отзывов.'
+            )
+
+        for url, status in (
+            (f'/api/v1/titles/{titles[0]["id"]}/similar/?limit=0',
+             HTTPStatus.BAD_REQUEST),
+            ('/api/v1/titles/100500/similar/', HTTPStatus.NOT_FOUND),
+        ):
+            assert client.get(url).status_code == status
+
+    def test_02_dissimilar(self, admin_client, client, user_client,
+                           moderator_client):
+        titles = self.create_rated_titles(
+            admin_client, (user_client, moderator_client),
+            ((10, 1), (9, 2))
+        )
+        call_command('rebuild_similar_titles', verbosity=0)
+        assert self.get_similar(client, titles[0]['id']) == [], (
+            'Проверьте, что произведения с противоположными оценками не '
+            'считаются похожими.'
+        )
+
+    def test_03_chunks_and_queries(self, admin_client, client, user_client,
+                                   moderator_client, settings):
+        from reviews.models import SimilarTitle
+
+        titles = self.create_rated_titles(
+            admin_client, (user_client, moderator_client),
+            ((10, 9), (8, 7))
+        )
+        settings.RECOMMENDATIONS = {'MIN_COMMON': 3}
+        call_command('rebuild_similar_titles', verbosity=0)
+        assert not SimilarTitle.objects.exists(), (
+            'Проверьте, что пары произведений с числом общих авторов меньше '
+            '`MIN_COMMON` не считаются похожими.'
+        )
+
+        settings.RECOMMENDATIONS = {'MIN_COMMON': 2}
+        call_command('rebuild_similar_titles', verbosity=0)
+        expected = set(
+            SimilarTitle.objects.values_list('title_id', 'similar_id')
+        )
+        call_command('rebuild_similar_titles', chunk_size=1, verbosity=0)
+        assert set(
+            SimilarTitle.objects.values_list('title_id', 'similar_id')
+        ) == expected == {
+            (titles[0]['id'], titles[1]['id']),
+            (titles[1]['id'], titles[0]['id']),
+        }, (
+            'Проверьте, что команда `rebuild_similar_titles` даёт тот же '
+            'результат при любом размере части и не дублирует строки.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_similar(client, titles[0]['id'], '?limit=5')
+        assert len(context.captured_queries) <= 3, (
+            'Проверьте, что после чтения версий данных похожие произведения '
+            'читаются одним запросом по индексу и одним запросом '
+            'загружаются их жанры.'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'EXPLAIN QUERY PLAN {context.captured_queries[1]["sql"]}'
+            )
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert 'similartitle_title_score' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
@@ -0,0 +1,127 @@
+import datetime as dt
+import math
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TrendingAPI:
+    url = '/api/v1/titles/trending/'
+
+    def create_activity(self, admin_client, user_client, moderator_client):
+        """Два отзыва и комментарий у первого произведения, отзыв у второго."""
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 8
+        ).json()
+        create_single_review(moderator_client, titles[0]['id'], 'Отзыв', 6)
+        create_single_comment(
+            admin_client, titles[0]['id'], review['id'], 'Комментарий'
+        )
+        review = create_single_review(
+            user_client, titles[1]['id'], 'Отзыв', 5
+        ).json()
+        return titles, review
+
+    def get_trending(self, client, query=''):
+        response = client.get(f'{self.url}{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}{query}` возвращает '
+            'ответ со статусом 200.'
+        )
+        return [
+            (title['name'], title['activity']) for title in response.json()
+        ]
+
+    def test_01_trending(self, admin_client, client, user_client,
+                         moderator_client):
+        titles, _ = self.create_activity(
+            admin_client, user_client, moderator_client
+        )
+        expected = [
+            (titles[0]['name'], pytest.approx(2.5, rel=1e-3)),
+            (titles[1]['name'], pytest.approx(1, rel=1e-3)),
+        ]
+        for query in ('', '?window=24h', '?window=1h', '?window=7d'):
+            assert self.get_trending(client, query) == expected, (
+                f'Проверьте, что `{self.url}{query}` сортирует произведения '
+                'по активности: отзыв весит 1, комментарий — 0.5.'
+            )
+        assert self.get_trending(client, '?limit=1') == expected[:1]
+        for query in ('?window=2h', '?limit=0'):
+            response = client.get(f'{self.url}{query}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что GET-запрос к `{self.url}{query}` '
+                'возвращает ответ со статусом 400.'
+            )
+
+    def test_02_decay(self, admin_client, client, user_client,
+                      moderator_client):
+        from reviews import trending
+
+        titles, _ = self.create_activity(
+            admin_client, user_client, moderator_client
+        )
+        trending.record(
+            titles[1]['id'], 'review', timezone.now() - dt.timedelta(days=1)
+        )
+        for query, activity in (
+            ('?window=24h', 1 + math.exp(-1)),
+            ('?window=7d', 1 + math.exp(-1 / 7)),
+            ('?window=1h', 1),
+        ):
+            assert dict(self.get_trending(client, query))[
+                titles[1]['name']
+            ] == pytest.approx(activity, rel=1e-3), (
+                'Проверьте, что вклад события затухает как '
+                'exp(-возраст / окно).'
+            )
+
+    def test_03_compaction(self, admin_client, client, user_client,
+                           moderator_client):
+        from reviews import trending
+        from reviews.models import TrendingScore
+
+        titles, review = self.create_activity(
+            admin_client, user_client, moderator_client
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review["id"]}/'
+        )
+        # Событие без отзыва: пересчёт по отзывам его не сохранит.
+        trending.record(
+            titles[0]['id'], 'review', timezone.now() - dt.timedelta(days=1)
+        )
+        assert [name for name, _ in self.get_trending(client)] == [
+            titles[0]['name'], titles[1]['name']
+        ]
+        call_command('compact_trending', verbosity=0)
+        assert self.get_trending(client) == [
+            (titles[0]['name'], pytest.approx(2.5, rel=1e-3)),
+        ], (
+            'Проверьте, что команда `compact_trending` пересчитывает '
+            'активность по отзывам и комментариям и убирает удалённые.'
+        )
+        assert TrendingScore.objects.count() == 3
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_trending(client, '?window=7d&limit=5')
+        assert len(context.captured_queries) <= 2, (
+            f'Проверьте, что `{self.url}` читает окно одним запросом по '
+            'индексу и одним запросом загружает жанры.'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'EXPLAIN QUERY PLAN {context.captured_queries[0]["sql"]}'
+            )
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert 'trendingscore_window_score' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
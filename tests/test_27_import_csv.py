@@ -0,0 +1,141 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+PUB_DATE = '2019-09-24T21:08:21.567Z'
+
+
+def write_csv(path, filename, rows):
+    with open(path / filename, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerows(rows)
+
+
+def write_data(path, pub_date=PUB_DATE):
+    """Два произведения, оценённые двумя общими авторами."""
+    write_csv(path, 'users.csv', [
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        (101, 'reader', 'reader@yamdb.fake', 'user', '', '', ''),
+        (102, 'critic', 'critic@yamdb.fake', 'user', '', '', ''),
+    ])
+    write_csv(path, 'category.csv', [
+        ('id', 'name', 'slug'), (1, 'Книга', 'book'),
+    ])
+    write_csv(path, 'genre.csv', [
+        ('id', 'name', 'slug'), (1, 'Драма', 'drama'),
+    ])
+    write_csv(path, 'titles.csv', [
+        ('id', 'name', 'year', 'category'),
+        (1, 'Мастер и Маргарита', 1966, 1),
+        (2, 'Собачье сердце', 1925, 1),
+        # Ссылка на отсутствующую категорию: строка пропускается.
+        (3, 'Без категории', 1990, 99),
+    ])
+    write_csv(path, 'genre_title.csv', [
+        ('id', 'title_id', 'genre_id'), (1, 1, 1), (2, 2, 1),
+    ])
+    write_csv(path, 'review.csv', [
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (1, 1, 'Роман', 101, 10, pub_date),
+        (2, 1, 'Роман', 102, 6, pub_date),
+        (3, 2, 'Повесть', 101, 9, pub_date),
+        (4, 2, 'Повесть', 102, 5, pub_date),
+    ])
+    write_csv(path, 'comments.csv', [
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (1, 1, 'Согласен', 102, pub_date),
+    ])
+
+
+def import_csv(path, *args):
+    out = StringIO()
+    call_command('import_csv', *args, path=str(path), stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27ImportCsvAPI:
+
+    def test_01_import(self, client, tmp_path):
+        from reviews.models import Review, Title
+
+        write_data(tmp_path)
+        out = import_csv(tmp_path, '--batch-size', '2')
+        assert 'titles.csv: 3 строк, новых 2, пропущено 1' in out, out
+        title = Title.objects.get(pk=1)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            16, 2, 8
+        ), 'Проверьте, что после загрузки пересчитываются рейтинги.'
+        assert Review.objects.get(pk=1).pub_date.year == 2019, (
+            'Проверьте, что даты публикации берутся из файла.'
+        )
+        response = client.get('/api/v1/search/?q=маргарита')
+        assert response.json()['results'][0]['id'] == 1, (
+            'Проверьте, что после загрузки перестраивается поисковый индекс.'
+        )
+
+    def test_02_rebuild_steps(self, client, tmp_path):
+        write_data(tmp_path, pub_date=timezone.now().isoformat())
+        import_csv(tmp_path)
+        response = client.get('/api/v1/titles/top/')
+        assert [title['id'] for title in response.json()] == [1, 2], (
+            'Проверьте, что после загрузки пересчитываются рейтинговые '
+            'таблицы.'
+        )
+        response = client.get('/api/v1/titles/trending/')
+        assert [title['id'] for title in response.json()] == [1, 2], (
+            'Проверьте, что после загрузки пересчитывается активность '
+            'произведений.'
+        )
+        response = client.get('/api/v1/titles/1/similar/')
+        assert [title['id'] for title in response.json()] == [2], (
+            'Проверьте, что после загрузки пересчитываются похожие '
+            'произведения.'
+        )
+
+    def test_03_rerun(self, tmp_path):
+        from reviews.models import Review, Title
+
+        write_data(tmp_path)
+        import_csv(tmp_path)
+        out = import_csv(tmp_path)
+        assert 'review.csv: 4 строк, новых 0, пропущено 4' in out, (
+            'Проверьте, что повторная загрузка пропускает строки, которые '
+            'уже есть в базе.'
+        )
+        assert Review.objects.count() == 4
+
+        with pytest.raises(CommandError, match='уже есть в базе'):
+            import_csv(tmp_path, '--strict')
+
+        write_csv(tmp_path, 'titles.csv', [
+            ('id', 'name', 'year', 'category'),
+            (1, 'Мастер и Маргарита', 1967, 1),
+        ])
+        import_csv(tmp_path)
+        assert Title.objects.get(pk=1).year == 1966
+        import_csv(tmp_path, '--update')
+        assert Title.objects.get(pk=1).year == 1967, (
+            'Проверьте, что с `--update` существующие строки обновляются.'
+        )
+
+    def test_04_jobs(self, tmp_path):
+        from reviews.models import Comment, GenreToTitle, Review, Title
+
+        write_data(tmp_path)
+        out = import_csv(tmp_path, '--jobs', '3', '--batch-size', '1')
+        assert [
+            model.objects.count()
+            for model in (Title, GenreToTitle, Review, Comment)
+        ] == [2, 2, 4, 1], (
+            'Проверьте, что загрузка в несколько потоков загружает все '
+            'строки.'
+        )
+        assert 'Этап 4 (comments)' in out
+        with pytest.raises(CommandError):
+            import_csv(tmp_path, '--jobs', '0')
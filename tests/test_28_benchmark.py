@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+def test_benchmark_smoke(tmp_path):
+    # Команда создаёт и удаляет собственную тестовую базу, поэтому
+    # запускается в отдельном процессе, не трогая базу тестов.
+    output = tmp_path / 'bench.json'
+    subprocess.run(
+        [
+            sys.executable, 'manage.py', 'benchmark',
+            '--users', '5', '--titles', '4', '--reviews', '12',
+            '--comments', '4', '--requests', '2', '--label', 'smoke',
+            '--output', str(output),
+        ],
+        cwd=settings.BASE_DIR, env={**os.environ, 'SECRET_KEY': 'smoke'},
+        check=True, capture_output=True, timeout=120
+    )
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['label'] == 'smoke'
+    assert report['dataset']['reviews'] == 12
+    scenarios = report['scenarios']
+    assert set(scenarios) == {
+        'title_list', 'title_filter', 'title_top', 'leaderboard', 'similar',
+        'trending', 'title_detail', 'review_list', 'comment_list', 'signup',
+        'token',
+    }
+    for name, result in scenarios.items():
+        assert (result['requests'], result['errors']) == (2, 0), (
+            f'Проверьте, что сценарий `{name}` команды `benchmark` '
+            'выполняется без ошибок.'
+        )
@@ -1,5 +1,8 @@
+import re
 from http import HTTPStatus
 
+from django.core import mail
+
 check_name_and_slug_patterns = (
     (
         {
@@ -304,3 +307,13 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def get_confirmation_code(email):
+    """Код подтверждения из последнего письма на email."""
+    for message in reversed(mail.outbox):
+        if email in message.to:
+            return re.search(r'<b>(\d+)</b>', message.body).group(1)
+    raise AssertionError(
+        f'Письмо с кодом подтверждения на {email} не найдено.'
+    )